@@ -1,44 +1,43 @@
 import random
 from manim import *
 from formulas import *
-from prover import ProofOperator, HonestProver
+from prover import ProofOperator, ProofSchedule, HonestProver
 from verifier import ProtocolObserver, run_verifier, evaluate_s, VERIFIER_DEFAULT_SEED
 from qbf_tree import QBFTree
+from interpolation import EvaluationForm
 
 
-def _get_proof_operators_mathtex(qbf: QBF):
+def _get_proof_operators_mathtex(qbf: QBF, schedule: ProofSchedule):
 
     po = []
 
-    for v in range(1, qbf.get_variable_count() + 1):
+    for op in schedule:
 
-        po.append(qbf.get_variable_latex_operator(v))
-
-        # append linearization terms
-
-        po.extend(("L_{%s}" % qbf.get_symbol(lin_v) for lin_v in range(1, v + 1)))
+        if op.is_linearity_operator():
+            po.append("L_{%s}" % qbf.get_symbol(op.lv))
+        else:
+            po.append(qbf.get_variable_latex_operator(op.v))
 
     mt = MathTex(*po, r"P_{\varphi}")
 
-    for v in range(1, qbf.get_variable_count() + 1):
+    for op in schedule:
 
-        pos = v * (v - 1) // 2
+        index = _proof_operator_to_mathtex_index(schedule, op)
 
-        if qbf.get_quantification(v) == QBF.Q_FORALL:
-            mt[pos + v - 1].set_color(RED_C)
+        if op.is_linearity_operator():
+            # color linearization operators
+            mt[index].set_color(PURPLE_A)
+        elif qbf.get_quantification(op.v) == QBF.Q_FORALL:
+            mt[index].set_color(RED_C)
         else:
-            assert qbf.get_quantification(v) == QBF.Q_EXISTS
-            mt[pos + v - 1].set_color(GOLD_C)
-
-        # color linearization operators
-        for i in range(v):
-            mt[pos + v + i].set_color(PURPLE_A)
+            assert qbf.get_quantification(op.v) == QBF.Q_EXISTS
+            mt[index].set_color(GOLD_C)
 
     return mt
 
 
-def _proof_operator_to_mathtex_index(op: ProofOperator):
-    return (op.v * (op.v - 1) // 2) + op.v + op.lv - 1
+def _proof_operator_to_mathtex_index(schedule: ProofSchedule, op: ProofOperator):
+    return schedule.get_round_number(op) - 1
 
 
 class AnimatingObserver(ProtocolObserver):
@@ -110,7 +109,7 @@ class AnimatingObserver(ProtocolObserver):
 
         # proof operators and the row underneath (with the variables)
 
-        self.proof_operators = _get_proof_operators_mathtex(self.scene.qbf)
+        self.proof_operators = _get_proof_operators_mathtex(self.scene.qbf, self._prover.schedule)
 
         self.rc_vars = [
             Variable(self.p, v.name, num_decimal_places=0)
@@ -160,6 +159,9 @@ class AnimatingObserver(ProtocolObserver):
 
     def _s_polynomial_to_mathtex(self, s, var_alias: str):
 
+        if isinstance(s, EvaluationForm):
+            s = s.to_poly(sympy.Symbol(var_alias))
+
         s_cleansed = sympy.trunc(sympy.expand(s.as_expr()), self.p, s.gens)
 
         return MathTex("s(%s) =" % var_alias, sympy.latex(s_cleansed))
@@ -178,7 +180,7 @@ class AnimatingObserver(ProtocolObserver):
             return
 
         new_operator_rect = SurroundingRectangle(
-            self.proof_operators[_proof_operator_to_mathtex_index(current_operator)],
+            self.proof_operators[_proof_operator_to_mathtex_index(self._prover.schedule, current_operator)],
             buff=.4 * SMALL_BUFF
         )
 
@@ -274,7 +276,7 @@ class AnimatingObserver(ProtocolObserver):
         else:
             assert False
 
-        if current_operator.is_last_operator(self.scene.qbf):
+        if self._prover.schedule.is_last_operator(current_operator):
             final_step = Tex(r"Proof accepted!")
             final_step[0].set_color(GREEN_C)
             verification_steps.append(final_step)
@@ -294,7 +296,7 @@ class AnimatingObserver(ProtocolObserver):
 
             _last_ver_step = ver_step
 
-        if current_operator.is_last_operator(self.scene.qbf):
+        if self._prover.schedule.is_last_operator(current_operator):
             # verifier accepts
             self.scene.wait(3)
             self.scene.play(FadeOut(verification_brace), FadeOut(_last_ver_step))
@@ -383,20 +385,22 @@ class ProtocolScene(Scene):
             skip_animations=False,
             qbf: QBF = default_example_formula(),
             rounds_limit: int = 0,
-            seed: int = VERIFIER_DEFAULT_SEED
+            seed: int = VERIFIER_DEFAULT_SEED,
+            adaptive: bool = False
     ):
         super().__init__(renderer, camera_class, always_update_mobjects, random_seed, skip_animations)
         self.qbf = qbf
         self.rounds_limit = rounds_limit
         self.seed = seed
+        self.adaptive = adaptive
 
     def construct(self):
 
-        prover = HonestProver(self.qbf)
+        prover = HonestProver(self.qbf, adaptive=self.adaptive)
 
         observer = AnimatingObserver(self, prover, self.rounds_limit)
 
-        run_verifier(self.qbf, prover, prover.p, seed=self.seed, observer=observer)
+        run_verifier(self.qbf, prover, prover.p, seed=self.seed, observer=observer, adaptive=self.adaptive)
 
 
 if __name__ == "__main__":
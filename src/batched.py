@@ -0,0 +1,187 @@
+from random import Random
+import logging
+from qbf import QBF
+from prover import Prover
+from interpolation import EvaluationForm, evaluation_point_count
+
+logger = logging.getLogger("protocol")
+
+
+def _eq(point: list, values: list, p: int) -> int:
+
+    result = 1
+
+    for r, a in zip(point, values):
+        result = result * (r * a + (1 - r) * (1 - a)) % p
+
+    return result
+
+
+def _format_point(point: list) -> str:
+    return "(%s)" % ", ".join(str(a) for a in point)
+
+
+# receive a message in evaluation form and make sure it does not exceed the degree bound
+def _receive(values: list, degree_bound: int, p: int):
+
+    if not 1 <= len(values) <= evaluation_point_count(degree_bound, p):
+        logger.info("[V]: The prover has sent %d values, exceeding the degree bound %d, rejecting.",
+                    len(values), degree_bound)
+        return None
+
+    s = EvaluationForm(values, p)
+
+    logger.info("[P]: Sending s at 0, ..., %d: %s", s.degree(), s)
+
+    return s
+
+
+# variant of the protocol in which the claims are always about the multilinear extensions M_v
+# of the quantified subformulas f_v, instead of running one round per linearity operator,
+# the linearization after a universal quantifier is a single sum-check over eq(point, b) * A(b) * B(b)
+#
+# rounds: n for the quantifiers, v - 1 for every universal variable v and n for the final
+# sum-check over P_phi, that is 2n + sum_{v universal} (v - 1) instead of n(n + 3) / 2, the
+# sum-checks of the universal variables keep the worst case quadratic in n
+# soundness: every round is a Schwartz-Zippel test of a polynomial of degree at most 3 in
+# the sum-checks of universal variables, 1 for quantifier rounds and 1 + deg_j(P_phi) in
+# the final sum-check, so a false claim is accepted with probability at most the sum of
+# these degrees divided by p
+def run_batched_verifier(qbf: QBF, /, prover: Prover, p: int, *, seed: int = None) -> bool:
+
+    rng = Random(seed)
+
+    n = qbf.get_variable_count()
+
+    c = prover.get_value_of_entire_polynomial()
+
+    logger.info("[P]: Value = %d =: c", c)
+
+    if c == 0:
+        return False
+
+    round_number = 0
+
+    # the current claim is c = M_{v - 1}(point)
+    point = []
+
+    for v in range(1, n + 1):
+
+        if qbf.get_quantification(v) == QBF.Q_FORALL:
+
+            # M_{v - 1}(point) = sum_b eq(point, b) * M_v(b, 0) * M_v(b, 1)
+            fixed = []
+
+            for j in range(1, v):
+
+                round_number += 1
+
+                logger.info("-" * 30)
+                logger.info("Starting round %d. Sum-check of A_{%s}, variable %s",
+                            round_number, qbf.get_name(v), qbf.get_name(j))
+
+                s = _receive(
+                    prover.get_product_sum_evaluations(v, point, fixed, evaluation_point_count(3, p) - 1), 3, p
+                )
+
+                if s is None:
+                    return False
+
+                check_sum = (s.evaluate(0) + s.evaluate(1)) % p
+
+                logger.info("[V]: s(0) + s(1) = %d, expecting to be equal to c = %d", check_sum, c)
+
+                if check_sum != c:
+                    logger.info("[V]: The above check has failed, rejecting.")
+                    return False
+
+                a = rng.randrange(p)
+                fixed.append(a)
+                c = s.evaluate(a)
+
+                logger.info("[V]: Chose a = %d for %s, s(a) = %d =: c", a, qbf.get_name(j), c)
+
+            # c = eq(point, fixed) * M_v(fixed, 0) * M_v(fixed, 1)
+            scale = _eq(point, fixed, p)
+            point = fixed
+
+        else:
+            scale = None
+
+        round_number += 1
+
+        logger.info("-" * 30)
+        logger.info("Starting round %d. Current operator: %s_{%s}, point %s",
+                    round_number, "A" if scale is not None else "E", qbf.get_name(v), _format_point(point))
+
+        s = _receive(prover.get_extension_evaluations(v, point, 1), 1, p)
+
+        if s is None:
+            return False
+
+        s_0 = s.evaluate(0)
+        s_1 = s.evaluate(1)
+
+        if scale is not None:
+            check_value = scale * s_0 % p * s_1 % p
+            logger.info("[V]: eq * s(0) * s(1) = %d, expecting to be equal to c = %d", check_value, c)
+        else:
+            check_value = (s_0 + s_1) % p
+            logger.info("[V]: s(0) + s(1) = %d, expecting to be equal to c = %d", check_value, c)
+
+        if check_value != c:
+            logger.info("[V]: The above check has failed, rejecting.")
+            return False
+
+        a = rng.randrange(p)
+        point = point + [a]
+        c = s.evaluate(a)
+
+        logger.info("[V]: Chose a = %d for %s, s(a) = %d =: c", a, qbf.get_name(v), c)
+
+    # M_n(point) = sum_b eq(point, b) * P_phi(b)
+    fixed = []
+
+    for j in range(1, n + 1):
+
+        round_number += 1
+
+        degree_bound = 1 + qbf.get_variable_degree(j)
+
+        logger.info("-" * 30)
+        logger.info("Starting round %d. Sum-check of P_phi, variable %s", round_number, qbf.get_name(j))
+
+        s = _receive(prover.get_matrix_sum_evaluations(point, fixed, evaluation_point_count(degree_bound, p) - 1),
+                     degree_bound, p)
+
+        if s is None:
+            return False
+
+        check_sum = (s.evaluate(0) + s.evaluate(1)) % p
+
+        logger.info("[V]: s(0) + s(1) = %d, expecting to be equal to c = %d", check_sum, c)
+
+        if check_sum != c:
+            logger.info("[V]: The above check has failed, rejecting.")
+            return False
+
+        a = rng.randrange(p)
+        fixed.append(a)
+        c = s.evaluate(a)
+
+        logger.info("[V]: Chose a = %d for %s, s(a) = %d =: c", a, qbf.get_name(j), c)
+
+    matrix_value = _eq(point, fixed, p) * qbf.evaluate_matrix(
+        {v: a for v, a in enumerate(fixed, start=1)}, p
+    ) % p
+
+    logger.info("-" * 30)
+    logger.info("[V]: eq * P_phi at the random choices = %d, expecting to be equal to c = %d", matrix_value, c)
+
+    if matrix_value != c:
+        logger.info("[V]: The above check has failed, rejecting.")
+        return False
+
+    logger.info("[V]: Proof accepted after %d rounds.", round_number)
+
+    return True
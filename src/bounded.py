@@ -0,0 +1,166 @@
+import logging
+import os
+import pickle
+from collections import OrderedDict
+from qbf import QBF
+from prover import HonestProver, ProofOperator, compile_for_variable
+from progress import PrecomputationMonitor
+from matrix_cache import MatrixCache
+
+logger = logging.getLogger("prover")
+
+
+# rough number of bytes taken by a sympy polynomial: every term stores
+# its exponent vector and its coefficient
+def estimate_polynomial_size(poly) -> int:
+    return sum(8 * (len(monom) + 1) + (int(coefficient).bit_length() + 7) // 8 for monom, coefficient in poly.terms())
+
+
+class _LRUCache:
+
+    # keeps the most recently used entries whose sizes add up to at most budget bytes
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.size = 0
+
+        self._entries = OrderedDict()
+
+    def get(self, key):
+
+        if key not in self._entries:
+            return None
+
+        self._entries.move_to_end(key)
+
+        return self._entries[key][0]
+
+    def put(self, key, value, size: int):
+
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+
+        # entries larger than the entire budget are not kept at all
+        if size > self.budget:
+            return
+
+        self._entries[key] = (value, size)
+        self.size += size
+
+        while self.size > self.budget:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+
+# stores the polynomials of the operator chain only at checkpoints, that is, for every quantifier
+# operator and for the last operator, the polynomials of the linearity operators in between are
+# recomputed from the next checkpoint when needed and kept in an LRU cache of the given size in bytes
+# with a spill directory, the checkpoints are written there and loaded on demand as well
+class MemoryBoundedProver(HonestProver):
+
+    def __init__(self, /, qbf: QBF, *, memory_budget: int = 1 << 26, spill_directory: str = None,
+                 adaptive: bool = False, modular: bool = False, processes: int = 1,
+                 matrix_cache: MatrixCache = None, monitor: PrecomputationMonitor = None, solve: bool = True):
+
+        self._cache = _LRUCache(memory_budget)
+        self._spilled = {}
+
+        super().__init__(qbf, adaptive=adaptive, modular=modular, processes=processes,
+                         matrix_cache=matrix_cache, monitor=monitor, solve=solve)
+
+        logger.info("Stored %d checkpoints of %d operator polynomials",
+                    len(self._polynomial_after_operator), len(self.schedule))
+
+        if spill_directory is not None:
+
+            os.makedirs(spill_directory, exist_ok=True)
+
+            for op, poly in self._polynomial_after_operator.items():
+
+                path = os.path.join(spill_directory, "checkpoint_%d_%d.pickle" % (op.v, op.lv))
+
+                with open(path, "wb") as f:
+                    pickle.dump(poly, f)
+
+                self._spilled[op] = path
+
+            self._polynomial_after_operator = {}
+
+    # the cache holds compiled evaluators, which can not be pickled
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["_cache"] = _LRUCache(self._cache.budget)
+        return state
+
+    def _is_checkpoint(self, operator: ProofOperator) -> bool:
+        return not operator.is_linearity_operator() or self.schedule.is_last_operator(operator)
+
+    def _store_polynomial(self, operator: ProofOperator, poly):
+        if self._is_checkpoint(operator):
+            super()._store_polynomial(operator, poly)
+
+    def _get_stored_polynomial(self, operator: ProofOperator):
+
+        if operator in self._polynomial_after_operator:
+            return self._polynomial_after_operator[operator]
+
+        poly = self._cache.get(operator)
+
+        if poly is not None:
+            return poly
+
+        if operator in self._spilled:
+            with open(self._spilled[operator], "rb") as f:
+                poly = pickle.load(f)
+        else:
+            # the polynomial of an operator is the next operator applied to the polynomial of the latter
+            next_operator = self.schedule.next_operator(operator)
+
+            poly = self._reduce_polynomial(
+                self._apply_operator(self._get_stored_polynomial(next_operator), next_operator)
+            )
+
+        self._cache.put(operator, poly, estimate_polynomial_size(poly))
+
+        return poly
+
+    # the terms of the blocks are kept in the cache as well, the array of the exponents
+    # and the one of the coefficients make up most of their size
+    def _get_block_terms(self, v: int) -> tuple:
+
+        terms = self._cache.get((v, "block"))
+
+        if terms is None:
+            terms = self._compute_block_terms(v)
+            self._cache.put((v, "block"), terms, terms[0].nbytes + terms[1].nbytes)
+
+        return terms
+
+    # the restrictions of the current session are only kept as long as the terms of their block
+    def _drop_evicted_session(self):
+        if self._session is not None and self._cache.get((self._session[0], "block")) is None:
+            self._session = None
+
+    def _get_linearity_coefficients(self, operator: ProofOperator, random_choices: dict) -> list:
+
+        self._drop_evicted_session()
+
+        coefficients = super()._get_linearity_coefficients(operator, random_choices)
+
+        self._drop_evicted_session()
+
+        return coefficients
+
+    def _get_compiled(self, operator: ProofOperator) -> tuple:
+
+        compiled = self._cache.get((operator, "compiled"))
+
+        if compiled is None:
+
+            poly = self._get_stored_polynomial(operator)
+
+            compiled = compile_for_variable(self.qbf, poly, operator.get_primary_variable(), self.p)
+
+            # the compiled program holds about one line per term
+            self._cache.put((operator, "compiled"), compiled, estimate_polynomial_size(poly))
+
+        return compiled
@@ -0,0 +1,81 @@
+import gzip
+import os
+import pickle
+import tempfile
+from qbf import QBF
+from prover import Prover
+
+
+class VerifierCheckpoint:
+
+    # the state of the verifier at the beginning of the round with the given number,
+    # challenges is the challenge source, including the state of its random number generator
+    def __init__(self, formula: dict, p: int, adaptive: bool, evaluation_form: bool,
+                 round_number: int, rc: dict, c: int, challenges):
+        self.formula = formula
+        self.p = p
+        self.adaptive = adaptive
+        self.evaluation_form = evaluation_form
+        self.round_number = round_number
+        self.rc = rc
+        self.c = c
+        self.challenges = challenges
+
+    # whether the checkpoint was taken in a session of the given protocol
+    def matches(self, qbf: QBF, p: int, adaptive: bool, evaluation_form: bool) -> bool:
+        return (self.formula, self.p, self.adaptive, self.evaluation_form) == \
+            (qbf.to_dict(), p, adaptive, evaluation_form)
+
+
+# the object is written to a temporary file next to the destination, which then replaces it,
+# so an interrupted write never leaves a truncated checkpoint behind
+def _write_atomically(path: str, obj):
+
+    directory = os.path.dirname(os.path.abspath(path))
+
+    fd, temporary_path = tempfile.mkstemp(dir=directory, prefix=".checkpoint-")
+
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(temporary_path, path)
+
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def _read(path: str):
+    with gzip.open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def write_verifier_checkpoint(path: str, checkpoint: VerifierCheckpoint):
+    _write_atomically(path, checkpoint)
+
+
+def read_verifier_checkpoint(path: str) -> VerifierCheckpoint:
+
+    checkpoint = _read(path)
+
+    if not isinstance(checkpoint, VerifierCheckpoint):
+        raise ValueError("%s does not contain a verifier checkpoint" % path)
+
+    return checkpoint
+
+
+# the prover is saved together with everything it has precomputed, caches of compiled
+# evaluators are dropped and rebuilt on demand after loading
+def save_prover(path: str, prover: Prover):
+    _write_atomically(path, prover)
+
+
+def load_prover(path: str) -> Prover:
+
+    prover = _read(path)
+
+    if not isinstance(prover, Prover):
+        raise ValueError("%s does not contain a prover" % path)
+
+    return prover
@@ -0,0 +1,245 @@
+import sympy
+from qbf import QBF
+
+
+# a quantified boolean formula whose matrix is a boolean circuit instead of a CNF, gates are numbered
+# in the order in which they are added, so the inputs of every gate precede it, and identical gates
+# are only stored once, the arithmetization follows the circuit gate by gate, sharing the polynomials
+# of gates used more than once, so no auxiliary variables are needed
+class CircuitQBF(QBF):
+
+    GATE_INPUT = "input"
+    GATE_NOT = "not"
+    GATE_AND = "and"
+    GATE_OR = "or"
+    GATE_XOR = "xor"
+
+    def __init__(self):
+        super().__init__()
+
+        # every gate is a pair of its kind and the tuple of its inputs, which are the numbers
+        # of other gates, except for input gates, whose only input is a variable
+        self._gates = []
+        self._gate_numbers = {}
+
+        # degree of the arithmetization of every gate in every variable it depends on
+        self._gate_degrees = []
+
+        # the conjunction of no gates is true
+        self._output = None
+
+    def add_clause(self, clause: set, /):
+        raise RuntimeError("The matrix of a circuit formula is given by its gates, not by clauses")
+
+    # the formula has no clauses, the clause-based algorithms, such as preprocessing
+    # or the multi-modular engine, raise a ValueError for it
+    def has_cnf_matrix(self) -> bool:
+        return False
+
+    def get_gate_count(self) -> int:
+        return len(self._gates)
+
+    def get_input(self, variable: int) -> int:
+
+        if not self._variable_defined(variable):
+            raise RuntimeError("Variable %d is not defined" % variable)
+
+        return self._add_gate(CircuitQBF.GATE_INPUT, (variable,))
+
+    # returns the number of the gate, the and, or and xor gates take any number of inputs,
+    # the and gate without inputs is true, the or and the xor gate without inputs are false
+    def add_gate(self, kind: str, *inputs: int) -> int:
+
+        for gate in inputs:
+            if not 0 <= gate < len(self._gates):
+                raise RuntimeError("Gate %d is not defined" % gate)
+
+        if kind == CircuitQBF.GATE_NOT:
+
+            if len(inputs) != 1:
+                raise ValueError("A negation takes exactly one input")
+
+            # double negations cancel out
+            if self._gates[inputs[0]][0] == CircuitQBF.GATE_NOT:
+                return self._gates[inputs[0]][1][0]
+
+            return self._add_gate(kind, inputs)
+
+        if kind in (CircuitQBF.GATE_AND, CircuitQBF.GATE_OR):
+            # both are idempotent and commutative
+            return self._add_gate(kind, tuple(sorted(set(inputs))))
+
+        if kind == CircuitQBF.GATE_XOR:
+            return self._add_gate(kind, tuple(sorted(inputs)))
+
+        raise ValueError("Unknown gate '%s'" % kind)
+
+    def _add_gate(self, kind: str, inputs: tuple) -> int:
+
+        if (kind, inputs) in self._gate_numbers:
+            return self._gate_numbers[(kind, inputs)]
+
+        if kind == CircuitQBF.GATE_INPUT:
+            degrees = {inputs[0]: 1}
+        else:
+            # negation keeps the degree, products of the inputs add their degrees
+            degrees = {}
+
+            for gate in inputs:
+                for v, d in self._gate_degrees[gate].items():
+                    degrees[v] = degrees.get(v, 0) + d
+
+        self._gate_numbers[(kind, inputs)] = len(self._gates)
+        self._gates.append((kind, inputs))
+        self._gate_degrees.append(degrees)
+
+        return len(self._gates) - 1
+
+    def set_output(self, gate: int):
+
+        if not 0 <= gate < len(self._gates):
+            raise RuntimeError("Gate %d is not defined" % gate)
+
+        self._output = gate
+
+    # the gates the output depends on, in increasing order
+    def _reachable_gates(self) -> list:
+
+        if self._output is None:
+            return []
+
+        reachable = {self._output}
+
+        for gate in range(self._output, -1, -1):
+            if gate in reachable and self._gates[gate][0] != CircuitQBF.GATE_INPUT:
+                reachable.update(self._gates[gate][1])
+
+        return sorted(reachable)
+
+    # evaluates the arithmetization of the reachable gates, given the values of the input
+    # gates and how to add, multiply and reduce values, returns the values of all these gates
+    def _evaluate_gates(self, gates: list, input_value, one, reduce) -> dict:
+
+        values = {}
+
+        for gate in gates:
+
+            kind, inputs = self._gates[gate]
+
+            if kind == CircuitQBF.GATE_INPUT:
+                value = input_value(inputs[0])
+
+            elif kind == CircuitQBF.GATE_NOT:
+                value = one - values[inputs[0]]
+
+            elif kind == CircuitQBF.GATE_AND:
+                value = one
+
+                for i in inputs:
+                    value = reduce(value * values[i])
+
+            elif kind == CircuitQBF.GATE_OR:
+                value = one
+
+                for i in inputs:
+                    value = reduce(value * (one - values[i]))
+
+                value = one - value
+
+            else:
+                value = one - one
+
+                # a xor b = a + b - 2ab
+                for i in inputs:
+                    value = reduce(value + values[i] - 2 * value * values[i])
+
+            values[gate] = reduce(value)
+
+        return values
+
+    # the polynomials of the reachable gates
+    def _arithmetize_gates(self) -> dict:
+
+        symbols = [v.symbol for v in self._var]
+
+        return self._evaluate_gates(
+            self._reachable_gates(),
+            lambda v: sympy.Poly(self.get_symbol(v), *symbols, domain=sympy.ZZ),
+            sympy.Poly(1, *symbols, domain=sympy.ZZ),
+            lambda value: value
+        )
+
+    def arithmetize_matrix(self):
+
+        if self._output is None:
+            return sympy.Poly(1, *(v.symbol for v in self._var), domain=sympy.ZZ)
+
+        return self._arithmetize_gates()[self._output]
+
+    # the factors of P_phi, the inputs of the output gate if it is a conjunction, and the
+    # output gate itself otherwise, each being a polynomial only in the variables it depends on
+    def arithmetize_clauses(self) -> list:
+
+        if self._output is None:
+            return []
+
+        polynomials = self._arithmetize_gates()
+
+        kind, inputs = self._gates[self._output]
+
+        factors = inputs if kind == CircuitQBF.GATE_AND else (self._output,)
+
+        return [polynomials[gate].exclude() for gate in factors]
+
+    # degree of the arithmetization in the given variable, bounded by the degrees of the gates
+    def get_variable_degree(self, variable: int) -> int:
+        assert variable >= 1
+
+        if self._output is None:
+            return 0
+
+        return self._gate_degrees[self._output].get(variable, 0)
+
+    def evaluate_matrix(self, values: dict, p: int) -> int:
+
+        if self._output is None:
+            return 1
+
+        return self._evaluate_gates(
+            self._reachable_gates(), lambda v: values[v] % p, 1, lambda value: value % p
+        )[self._output]
+
+    def to_dict(self) -> dict:
+        return {
+            "variables": super().to_dict()["variables"],
+            "gates": [[kind] + list(inputs) for kind, inputs in self._gates],
+            "output": self._output
+        }
+
+    @staticmethod
+    def from_dict(data: dict):
+
+        qbf = CircuitQBF()
+
+        for i, v in enumerate(data["variables"]):
+
+            if v["quantification"] not in ("forall", "exists"):
+                raise ValueError("Unknown quantification '%s'" % v["quantification"])
+
+            quantification = QBF.Q_FORALL if v["quantification"] == "forall" else QBF.Q_EXISTS
+            qbf.add_variable(i + 1, quantification, v["name"])
+
+        for gate in data["gates"]:
+
+            if gate[0] == CircuitQBF.GATE_INPUT:
+                number = qbf.get_input(gate[1])
+            else:
+                number = qbf.add_gate(gate[0], *gate[1:])
+
+            if number != len(qbf._gates) - 1:
+                raise ValueError("Gate %s is not in normal form" % gate)
+
+        if data["output"] is not None:
+            qbf.set_output(data["output"])
+
+        return qbf
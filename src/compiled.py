@@ -0,0 +1,115 @@
+class CompiledPolynomial:
+
+    # compiles the polynomial into a straight-line program of modular multiply-adds,
+    # the program evaluates a nested Horner scheme in the given variable order and
+    # returns the coefficients of the polynomial in the first (primary) variable
+    def __init__(self, poly, symbols: list, p: int):
+        assert len(symbols) >= 1
+
+        self.symbols = symbols
+        self.p = p
+
+        positions = [poly.gens.index(symbol) if symbol in poly.gens else None for symbol in symbols]
+
+        terms = []
+
+        for monom, coefficient in poly.terms():
+
+            coefficient = int(coefficient) % p
+
+            if coefficient != 0:
+                terms.append((tuple(monom[i] if i is not None else 0 for i in positions), coefficient))
+
+        self._lines = []
+        self._temporaries = 0
+        self._powers = set()
+
+        by_primary_degree = _group_by(terms, 0)
+
+        self.degree = max(by_primary_degree.keys(), default=0)
+
+        coefficient_names = [
+            self._emit(by_primary_degree.get(e, []), 1) for e in range(self.degree + 1)
+        ]
+
+        source = ["def _compiled(x, p):"]
+        source += ["    x%d = x[%d]" % (i, i - 1) for i in range(1, len(symbols))]
+        source += ["    x%d_%d = x%d_%d * x%d %% p" % (i, e, i, e - 1, i) if e > 2 else
+                   "    x%d_2 = x%d * x%d %% p" % (i, i, i)
+                   for i, e in sorted(self._powers)]
+        source += ["    " + line for line in self._lines]
+        source += ["    return [%s]" % ", ".join(coefficient_names)]
+
+        namespace = {}
+        exec(compile("\n".join(source), "<compiled polynomial>", "exec"), namespace)
+
+        self._program = namespace["_compiled"]
+
+    def _power(self, variable: int, exponent: int) -> str:
+
+        if exponent == 1:
+            return "x%d" % variable
+
+        for e in range(2, exponent + 1):
+            self._powers.add((variable, e))
+
+        return "x%d_%d" % (variable, exponent)
+
+    # emit code computing the polynomial given by the terms in the variables depth, depth + 1, ...
+    # the result is the name of a temporary variable or a constant
+    def _emit(self, terms: list, depth: int) -> str:
+
+        if len(terms) == 0:
+            return "0"
+
+        if depth == len(self.symbols):
+            return str(sum(coefficient for _, coefficient in terms) % self.p)
+
+        groups = _group_by(terms, depth)
+
+        if len(groups) == 1 and 0 in groups:
+            return self._emit(groups[0], depth + 1)
+
+        exponents = sorted(groups.keys(), reverse=True)
+
+        if exponents[-1] != 0:
+            exponents.append(0)
+
+        acc = self._emit(groups[exponents[0]], depth + 1)
+
+        for previous, e in zip(exponents, exponents[1:]):
+
+            name = "t%d" % self._temporaries
+            self._temporaries += 1
+
+            addend = " + " + self._emit(groups[e], depth + 1) if e in groups else ""
+
+            self._lines.append("%s = (%s * %s%s) %% p" % (name, acc, self._power(depth, previous - e), addend))
+
+            acc = name
+
+        return acc
+
+    # coefficients of the polynomial in the primary variable, lowest degree first, values holds
+    # the values of the remaining variables in order, they may also be numpy arrays
+    def coefficients(self, values) -> list:
+        return self._program(values, self.p)
+
+    def evaluate(self, primary_value, values):
+
+        result = 0
+
+        for c in reversed(self.coefficients(values)):
+            result = (result * primary_value + c) % self.p
+
+        return result
+
+
+def _group_by(terms: list, depth: int) -> dict:
+
+    groups = {}
+
+    for monom, coefficient in terms:
+        groups.setdefault(monom[depth], []).append((monom, coefficient))
+
+    return groups
@@ -0,0 +1,316 @@
+import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import sympy
+from qbf import QBF
+from prime import next_prime
+from prover import Prover, ProofOperator, ProofSchedule, compile_for_variable, \
+    _linearity_operator, _forall_operator, _exists_operator, _evaluate_coefficients
+
+logger = logging.getLogger("prover")
+
+
+class _UnionFind:
+
+    def __init__(self):
+        self._parent = {}
+
+    def find(self, x: int) -> int:
+
+        self._parent.setdefault(x, x)
+
+        while self._parent[x] != x:
+            # path halving
+            self._parent[x] = self._parent[self._parent[x]]
+            x = self._parent[x]
+
+        return x
+
+    def union(self, x: int, y: int):
+        self._parent[self.find(x)] = self.find(y)
+
+
+# partition of the non-empty clauses into components that do not share any variables,
+# every component is given by the sorted list of its variables and the indices of its clauses
+def find_components(qbf: QBF) -> list:
+
+    if not qbf.has_cnf_matrix():
+        raise ValueError("Splitting into components only applies to formulas whose matrix is in CNF")
+
+    clauses = list(qbf.get_clauses())
+
+    union_find = _UnionFind()
+
+    for clause in clauses:
+
+        variables = [abs(literal) for literal in clause]
+
+        for v in variables:
+            union_find.union(v, variables[0])
+
+    components = {}
+
+    for i, clause in enumerate(clauses):
+
+        if len(clause) == 0:
+            continue
+
+        variables, clause_indices = components.setdefault(union_find.find(abs(next(iter(clause)))), (set(), []))
+
+        variables.update(abs(literal) for literal in clause)
+        clause_indices.append(i)
+
+    return sorted(
+        ((sorted(variables), clause_indices) for variables, clause_indices in components.values()),
+        key=lambda component: component[0][0]
+    )
+
+
+# the operator chain restricted to the product of the given clauses, returns the polynomial
+# to which every operator is applied, in the order of the operators, and the final value
+# operators on variables of other components leave the product unchanged, except for
+# universal quantifiers, which square it
+def _component_tables(formula: dict, clause_indices: list, operators: list) -> tuple:
+
+    qbf = QBF.from_dict(formula)
+
+    clauses = list(qbf.get_clauses())
+    factors = qbf.arithmetize_clauses()
+
+    variables = set(abs(literal) for i in clause_indices for literal in clauses[i])
+
+    poly = factors[clause_indices[0]]
+
+    for i in clause_indices[1:]:
+        poly = poly * factors[i]
+
+    tables = []
+
+    for v, lv in reversed(operators):
+
+        tables.append(poly)
+
+        if lv != 0:
+            symbol = qbf.get_symbol(lv)
+
+            # the linearity operator does not change polynomials of degree at most 1
+            if lv in variables and symbol in poly.gens and poly.degree(symbol) > 1:
+                poly = _linearity_operator(poly, symbol)
+
+        elif v in variables:
+            if qbf.get_quantification(v) == QBF.Q_FORALL:
+                poly = _forall_operator(poly, qbf.get_symbol(v))
+            else:
+                poly = _exists_operator(poly, qbf.get_symbol(v))
+
+        elif qbf.get_quantification(v) == QBF.Q_FORALL:
+            poly = poly ** 2
+
+    tables.reverse()
+
+    assert poly.is_ground, "Polynomial at the end of the protocol is not trivial"
+
+    return tables, int(poly.LC())
+
+
+# tables of components computed by earlier provers, keyed by the variables and the clauses of the
+# component, which determine them completely, so that provers for edited versions of a formula only
+# compute the components affected by the edit, at most max_entries components are kept
+class ComponentTableCache:
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+
+        if key not in self._entries:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+
+        return self._entries[key]
+
+    def put(self, key, tables: tuple):
+
+        self._entries[key] = tables
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# the tables are polynomials in the symbols of the variables, so their names are part of the key
+def _component_key(formula: dict, clauses: list) -> tuple:
+    return (
+        tuple((v["name"], v["quantification"]) for v in formula["variables"]),
+        tuple(sorted(tuple(sorted(clause)) for clause in clauses))
+    )
+
+
+def _multiply(a: list, b: list, p: int) -> list:
+
+    result = [0] * (len(a) + len(b) - 1)
+
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            result[i + j] = (result[i + j] + x * y) % p
+
+    return result
+
+
+# P_phi is the product of the polynomials of its components, which are computed independently,
+# in parallel across processes, the s polynomials are the products of the component restrictions
+# with a table cache shared between provers, components that did not change since an earlier
+# prover, for instance after adding or removing a clause, are not computed again
+class ComponentProver(Prover):
+
+    def __init__(self, /, qbf: QBF, *, adaptive: bool = False, processes: int = None,
+                 table_cache: ComponentTableCache = None):
+        super().__init__(qbf, 0)
+
+        self.schedule = ProofSchedule(qbf, adaptive)
+
+        self.components = find_components(qbf)
+
+        logger.info("The matrix consists of %d independent components", len(self.components))
+
+        if table_cache is None:
+            table_cache = ComponentTableCache()
+
+        # the tables are computed for the operators of the non-adaptive schedule, which include the ones
+        # of any adaptive schedule, so that they do not depend on the degrees of the other components
+        operators = [(op.v, op.lv) for op in ProofSchedule(qbf)]
+
+        formula = qbf.to_dict()
+
+        clauses = list(qbf.get_clauses())
+
+        component_clauses = [[clauses[i] for i in clause_indices] for _, clause_indices in self.components]
+
+        keys = [_component_key(formula, component) for component in component_clauses]
+
+        results = [table_cache.get(key) for key in keys]
+
+        # every component not found in the cache is computed from a formula consisting of its clauses only
+        missing = [k for k, result in enumerate(results) if result is None]
+
+        component_formulas = [
+            {"variables": formula["variables"], "clauses": [sorted(clause, key=abs) for clause in component_clauses[k]]}
+            for k in missing
+        ]
+
+        if processes == 1 or len(missing) <= 1:
+            computed = [
+                _component_tables(component_formula, list(range(len(component_formula["clauses"]))), operators)
+                for component_formula in component_formulas
+            ]
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                computed = list(executor.map(
+                    _component_tables,
+                    component_formulas,
+                    [list(range(len(component_formula["clauses"]))) for component_formula in component_formulas],
+                    [operators] * len(missing)
+                ))
+
+        for k, (tables, value) in zip(missing, computed):
+            results[k] = (dict(zip(operators, tables)), value)
+            table_cache.put(keys[k], results[k])
+
+        logger.info("Reused the tables of %d of %d components", len(self.components) - len(missing),
+                    len(self.components))
+
+        # the constant factor accounts for empty clauses and for variables not occurring in any clause
+        constant = 0 if any(len(clause) == 0 for clause in qbf.get_clauses()) else 1
+
+        occurring = set(v for variables, _ in self.components for v in variables)
+
+        self._constants = {}
+
+        for op in reversed(self.schedule.get_operators()):
+
+            self._constants[op] = constant
+
+            if op.is_linearity_operator():
+                continue
+
+            # every universal quantifier squares the constant, existential ones double it
+            # only if the variable does not occur in any component
+            if qbf.get_quantification(op.v) == QBF.Q_FORALL:
+                constant = constant ** 2
+            elif op.v not in occurring:
+                constant = 2 * constant
+
+        self.entire_polynomial_value = constant
+
+        for _, value in results:
+            self.entire_polynomial_value *= value
+
+        self.p = qbf.get_lower_bound_for_protocol_prime()
+
+        if self.entire_polynomial_value != 0:
+            # qbf sentence is true
+            while self.entire_polynomial_value % self.p == 0:
+                self.p = next_prime(self.p)
+
+            self.entire_polynomial_value %= self.p
+
+        self._tables = [
+            {op: tables[(op.v, op.lv)].trunc(self.p) for op in self.schedule} for tables, _ in results
+        ]
+
+        self._constants = {op: constant % self.p for op, constant in self._constants.items()}
+
+        self._compiled = {}
+
+    # the compiled evaluators can not be pickled, they are compiled again when needed
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_compiled"] = {}
+        return state
+
+    def get_value_of_entire_polynomial(self) -> int:
+        return self.entire_polynomial_value
+
+    # coefficients of s, the product of the constant and the restrictions of all components
+    def _get_s_coefficients(self, operator: ProofOperator, random_choices: dict) -> list:
+
+        coefficients = [self._constants[operator]]
+
+        for k, tables in enumerate(self._tables):
+
+            if (k, operator) not in self._compiled:
+                self._compiled[(k, operator)] = compile_for_variable(
+                    self.qbf, tables[operator], operator.get_primary_variable(), self.p
+                )
+
+            compiled, others = self._compiled[(k, operator)]
+
+            coefficients = _multiply(
+                coefficients, compiled.coefficients([random_choices[v] for v in others]), self.p
+            )
+
+        return coefficients
+
+    def _get_operator_polynomial(self, operator: ProofOperator, random_choices: dict):
+        return sympy.Poly(
+            list(reversed(self._get_s_coefficients(operator, random_choices))),
+            self.qbf.get_symbol(operator.get_primary_variable()),
+            domain=sympy.ZZ
+        ).trunc(self.p)
+
+    def _get_operator_evaluations(self, operator: ProofOperator, random_choices: dict, degree: int) -> list:
+
+        coefficients = self._get_s_coefficients(operator, random_choices)
+
+        return [_evaluate_coefficients(coefficients, x, self.p) for x in range(degree + 1)]
@@ -0,0 +1,209 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from qbf import QBF
+from prime import is_prime, next_prime
+from solver import QBFSolver
+
+logger = logging.getLogger("prover")
+
+# word-sized primes, products of residues modulo them fit into 64 bits
+WORD_PRIME_BOUND = 1 << 31
+
+
+# the largest count primes below WORD_PRIME_BOUND
+def word_primes(count: int) -> list:
+
+    primes = []
+    candidate = WORD_PRIME_BOUND - 1
+
+    while len(primes) < count:
+        if is_prime(candidate):
+            primes.append(candidate)
+        candidate -= 2
+
+    return primes
+
+
+def _modulus_array(moduli: list):
+    return np.array(moduli, dtype=np.int64 if max(moduli) < WORD_PRIME_BOUND else object)
+
+
+# status of the matrix under a partial assignment: False if some clause is falsified,
+# True if every clause is satisfied and None otherwise
+def _matrix_status(clauses: list, assignment: dict):
+
+    satisfied = True
+
+    for clause in clauses:
+
+        clause_satisfied = False
+        undecided = False
+
+        for literal in clause:
+            value = assignment.get(abs(literal))
+
+            if value is None:
+                undecided = True
+            elif value == (literal > 0):
+                clause_satisfied = True
+                break
+
+        if not clause_satisfied:
+            if not undecided:
+                return False
+            satisfied = False
+
+    return satisfied if satisfied else None
+
+
+# residues of the value of the quantified arithmetization modulo every given modulus,
+# the value is computed by a depth-first traversal of the assignments, f_n = P_phi is 0 or 1 on
+# the hypercube and f_{v - 1} is the sum (exists) or the product (forall) of f_v at v = 0 and 1,
+# the memory needed is O(n) residues per modulus
+def _residues(formula: dict, moduli: list) -> list:
+
+    qbf = QBF.from_dict(formula)
+
+    n = qbf.get_variable_count()
+    clauses = [list(clause) for clause in qbf.get_clauses()]
+    forall = [None] + [qbf.get_quantification(v) == QBF.Q_FORALL for v in range(1, n + 1)]
+
+    m = _modulus_array(moduli)
+
+    # satisfied[v] holds the residues of f_{v - 1} if all clauses are already satisfied
+    satisfied = [None] * (n + 2)
+    satisfied[n + 1] = np.ones(len(moduli), dtype=m.dtype) % m
+
+    for v in range(n, 0, -1):
+        satisfied[v] = satisfied[v + 1] * (satisfied[v + 1] if forall[v] else 2) % m
+
+    zero = np.zeros(len(moduli), dtype=m.dtype)
+
+    assignment = {}
+
+    def value(v: int):
+
+        status = _matrix_status(clauses, assignment)
+
+        if status is not None:
+            # the subtree is constant, no further branching is necessary
+            return satisfied[v] if status else zero
+
+        assignment[v] = False
+        low = value(v + 1)
+        assignment[v] = True
+        high = value(v + 1)
+        del assignment[v]
+
+        return low * high % m if forall[v] else (low + high) % m
+
+    return [int(r) for r in value(1)]
+
+
+# computes the value of the quantified arithmetization modulo many primes, without ever
+# constructing the exact integer, which is doubly exponential in the number of universal variables
+class MultiModularEngine:
+
+    # processes > 1 distributes the moduli across that many worker processes,
+    # None uses as many as there are processors
+    def __init__(self, qbf: QBF, *, processes: int = 1, batch_size: int = 16):
+
+        if not qbf.has_cnf_matrix():
+            raise ValueError("The multi-modular engine only applies to formulas whose matrix is in CNF")
+
+        self.qbf = qbf
+        self.processes = processes
+        self.batch_size = batch_size
+
+        self._formula = qbf.to_dict()
+        self._true = None
+
+    def residues(self, moduli: list) -> list:
+
+        if len(moduli) == 0:
+            return []
+
+        if self.processes == 1 or len(moduli) == 1:
+            return _residues(self._formula, moduli)
+
+        chunk = -(-len(moduli) // (self.processes or len(moduli)))
+        chunks = [moduli[i:i + chunk] for i in range(0, len(moduli), chunk)]
+
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            results = executor.map(_residues, [self._formula] * len(chunks), chunks)
+
+        return [r for result in results for r in result]
+
+    # the value is positive if and only if the formula is true
+    def is_true(self) -> bool:
+
+        if self._true is None:
+            self._true = QBFSolver(self.qbf).solve()
+
+        return self._true
+
+    # upper bound on the bit length of the value, f_n is at most 1, existential quantifiers
+    # add at most one bit, universal ones at most double the bit length
+    def value_bit_bound(self) -> int:
+
+        bits = 0
+
+        for v in range(self.qbf.get_variable_count(), 0, -1):
+            bits = 2 * bits if self.qbf.get_quantification(v) == QBF.Q_FORALL else bits + 1
+
+        return bits
+
+    # smallest prime p at least the lower bound of the formula, such that the value does not vanish
+    # modulo p, together with the value modulo p, candidates are tried in batches
+    def protocol_prime(self) -> tuple:
+
+        p = self.qbf.get_lower_bound_for_protocol_prime()
+
+        if not self.is_true():
+            return p, 0
+
+        while True:
+
+            candidates = [p]
+
+            while len(candidates) < self.batch_size:
+                candidates.append(next_prime(candidates[-1]))
+
+            for q, r in zip(candidates, self.residues(candidates)):
+                if r != 0:
+                    logger.info("Value modulo %d is %d", q, r)
+                    return q, r
+
+            p = next_prime(candidates[-1])
+
+    # exact value, reconstructed by the chinese remainder theorem from residues modulo
+    # as many word-sized primes as the bit length bound requires
+    def exact_value(self, max_bits: int = 1 << 16) -> int:
+
+        if not self.is_true():
+            return 0
+
+        bits = self.value_bit_bound()
+
+        if bits > max_bits:
+            raise ValueError("The value may have %d bits, exceeding the limit of %d bits" % (bits, max_bits))
+
+        # every word prime contributes 30 bits to the product of the moduli
+        primes = word_primes(bits // 30 + 1)
+
+        return _garner(self.residues(primes), primes)
+
+
+# the unique x with 0 <= x < prod(moduli) and x = residues[i] modulo moduli[i]
+def _garner(residues: list, moduli: list) -> int:
+
+    x = 0
+    modulus = 1
+
+    for r, m in zip(residues, moduli):
+        t = (r - x) * pow(modulus, -1, m) % m
+        x += t * modulus
+        modulus *= m
+
+    return x
@@ -0,0 +1,276 @@
+import logging
+from qbf import QBF
+from prover import Prover, HonestProver, ProofSchedule
+from bounded import MemoryBoundedProver
+from sumcheck import SumcheckProver
+from components import ComponentProver, find_components
+
+logger = logging.getLogger("prover")
+
+# rough costs of a single operation on a term of a symbolic polynomial and on an entry of a
+# hypercube table, they only serve to compare formulas against limits, they do not predict
+# exact running times
+SECONDS_PER_TERM_OPERATION = 3e-4
+SECONDS_PER_TABLE_OPERATION = 1e-8
+BYTES_PER_TERM = 40
+BYTES_PER_TABLE_ENTRY = 8
+
+# memory budget given to the memory-bounded prover created by the admission policy
+MEMORY_BOUNDED_BUDGET = 1 << 26
+
+
+class AdmissionRefused(Exception):
+    pass
+
+
+class BackendCost:
+
+    def __init__(self, seconds: float, memory: int):
+        self.seconds = seconds
+        self.memory = memory
+
+    def __str__(self):
+        return "%.3g s, %.3g MB" % (self.seconds, self.memory / (1 << 20))
+
+
+def _product(values) -> int:
+
+    result = 1
+
+    for value in values:
+        result *= value
+
+    return result
+
+
+# bounds on the terms of the polynomial every operator is applied to, in reverse order of the operators,
+# and the amount of term operations needed to apply all of them, given the degree bounds of the variables
+# the polynomial depends on, a universal quantifier on any other variable squares the polynomial
+def _track_terms(qbf: QBF, operators: list, degree: dict, matrix_terms: int) -> tuple:
+
+    term_bounds = {}
+    term_operations = 0
+
+    for op in reversed(operators):
+
+        terms = _product(d + 1 for d in degree.values())
+
+        if len(term_bounds) == 0:
+            terms = min(terms, matrix_terms)
+
+        term_bounds[op] = terms
+
+        variable = op.get_primary_variable()
+
+        if variable not in degree:
+
+            if not op.is_linearity_operator() and qbf.get_quantification(variable) == QBF.Q_FORALL:
+                term_operations += terms ** 2
+
+                for v in degree:
+                    degree[v] *= 2
+
+            continue
+
+        if op.is_linearity_operator():
+            term_operations += terms
+            degree[variable] = min(degree[variable], 1)
+            continue
+
+        if qbf.get_quantification(variable) == QBF.Q_FORALL:
+            # both restrictions have at most terms / (deg + 1) terms and are multiplied
+            term_operations += (terms // (degree[variable] + 1)) ** 2
+
+            for v in degree:
+                degree[v] *= 2
+        else:
+            term_operations += terms
+
+        del degree[variable]
+
+    return term_bounds, term_operations
+
+
+class CostEstimate:
+
+    # static estimate of the cost of proving the formula, derived from the clauses and the
+    # proof schedule only, every stored polynomial has at most prod_v (deg_v + 1) terms,
+    # where deg_v is the degree bound of variable v tracked along the operator chain
+    def __init__(self, qbf: QBF, adaptive: bool = False):
+
+        if not qbf.has_cnf_matrix():
+            raise ValueError("The cost estimate only applies to formulas whose matrix is in CNF")
+
+        self.variable_count = qbf.get_variable_count()
+        self.clause_count = qbf.get_clause_count()
+        self.max_clause_width = max((len(clause) for clause in qbf.get_clauses()), default=0)
+
+        schedule = ProofSchedule(qbf, adaptive)
+
+        self.rounds = len(schedule)
+        self.max_degree = max((schedule.get_degree_bound(op) for op in schedule), default=0)
+        self.prime_bits = qbf.get_lower_bound_for_protocol_prime().bit_length()
+
+        # the matrix arithmetization has at most 2^w terms per clause of width w
+        matrix_terms = _product(1 << len(clause) for clause in qbf.get_clauses())
+
+        degree = {v: qbf.get_variable_degree(v) for v in range(1, self.variable_count + 1)}
+
+        self.term_bounds, self.term_operations = _track_terms(qbf, schedule.get_operators(), degree, matrix_terms)
+
+        self.max_terms = max(self.term_bounds.values(), default=1)
+
+        # the estimated cost of every prover backend able to follow the schedule
+        self.backends = {}
+
+    def log(self):
+
+        logger.info("Estimated cost: %d rounds, degree at most %d, prime of at least %d bits, "
+                    "at most %d terms per stored polynomial",
+                    self.rounds, self.max_degree, self.prime_bits, self.max_terms)
+
+        for name, cost in self.backends.items():
+            logger.info("Estimated cost of the %s prover: %s", name, cost)
+
+
+def _estimate_honest(qbf: QBF, estimate: CostEstimate) -> BackendCost:
+    return BackendCost(
+        estimate.term_operations * SECONDS_PER_TERM_OPERATION,
+        sum(estimate.term_bounds.values()) * BYTES_PER_TERM
+    )
+
+
+def _estimate_memory_bounded(qbf: QBF, estimate: CostEstimate) -> BackendCost:
+
+    # only the polynomials of the quantifier operators and of the last operator are kept,
+    # the others are computed a second time while answering the verifier
+    checkpoints = sum(
+        terms for i, (op, terms) in enumerate(estimate.term_bounds.items())
+        if i == 0 or not op.is_linearity_operator()
+    )
+
+    recomputed = sum(estimate.term_bounds.values()) - checkpoints
+
+    return BackendCost(
+        2 * estimate.term_operations * SECONDS_PER_TERM_OPERATION,
+        checkpoints * BYTES_PER_TERM + min(recomputed * BYTES_PER_TERM, MEMORY_BOUNDED_BUDGET)
+    )
+
+
+def _estimate_sumcheck(qbf: QBF, estimate: CostEstimate) -> BackendCost:
+
+    n = estimate.variable_count
+
+    # the matrix is evaluated on the hypercube once, and every round folds
+    # tables of at most 2^(n + 1) entries at every point up to the degree bound
+    operations = (1 << n) * (estimate.clause_count * max(estimate.max_clause_width, 1) + 1) + \
+        estimate.rounds * (2 << n) * (estimate.max_degree + 1)
+
+    # the tables are kept both exactly and modulo p
+    return BackendCost(operations * SECONDS_PER_TABLE_OPERATION, 2 * (2 << n) * BYTES_PER_TABLE_ENTRY)
+
+
+def _estimate_components(qbf: QBF, estimate: CostEstimate) -> BackendCost:
+
+    seconds = 0
+    memory = 0
+
+    clauses = list(qbf.get_clauses())
+
+    # the component prover applies the operators of the non-adaptive schedule to every component,
+    # the universal quantifiers on variables of other components square its polynomial
+    operators = ProofSchedule(qbf).get_operators()
+
+    for variables, clause_indices in find_components(qbf):
+
+        degree = {v: qbf.get_variable_degree(v) for v in variables}
+        matrix_terms = _product(1 << len(clauses[i]) for i in clause_indices)
+
+        term_bounds, term_operations = _track_terms(qbf, operators, degree, matrix_terms)
+
+        # the components are processed in parallel, their polynomials are stored for every operator
+        seconds = max(seconds, term_operations * SECONDS_PER_TERM_OPERATION)
+        memory += sum(term_bounds.values()) * BYTES_PER_TERM
+
+    return BackendCost(seconds, memory)
+
+
+class _ProverBackend:
+
+    def __init__(self, make_prover, estimate, supports_adaptive: bool):
+        self.make_prover = make_prover
+        self.estimate = estimate
+        self.supports_adaptive = supports_adaptive
+
+
+# the provers the admission policy can choose from, by name
+PROVER_BACKENDS = {
+    "honest": _ProverBackend(
+        lambda qbf, adaptive: HonestProver(qbf, adaptive=adaptive),
+        _estimate_honest, True
+    ),
+    "memory_bounded": _ProverBackend(
+        lambda qbf, adaptive: MemoryBoundedProver(
+            qbf, memory_budget=MEMORY_BOUNDED_BUDGET, adaptive=adaptive
+        ),
+        _estimate_memory_bounded, True
+    ),
+    "component": _ProverBackend(
+        lambda qbf, adaptive: ComponentProver(qbf, adaptive=adaptive),
+        _estimate_components, True
+    ),
+    "sumcheck": _ProverBackend(
+        lambda qbf, adaptive: SumcheckProver(qbf),
+        _estimate_sumcheck, False
+    ),
+}
+
+
+def estimate_cost(qbf: QBF, adaptive: bool = False) -> CostEstimate:
+
+    estimate = CostEstimate(qbf, adaptive)
+
+    for name, backend in PROVER_BACKENDS.items():
+        if backend.supports_adaptive or not adaptive:
+            estimate.backends[name] = backend.estimate(qbf, estimate)
+
+    return estimate
+
+
+class AdmissionPolicy:
+
+    # limits of None are not enforced, the backends are tried in the given order
+    # and the first one whose estimate is within the limits is chosen
+    def __init__(self, *, max_seconds: float = None, max_memory: int = None,
+                 backends: tuple = ("honest", "memory_bounded")):
+        self.max_seconds = max_seconds
+        self.max_memory = max_memory
+        self.backends = backends
+
+    def _within_limits(self, cost: BackendCost) -> bool:
+        return (self.max_seconds is None or cost.seconds <= self.max_seconds) and \
+            (self.max_memory is None or cost.memory <= self.max_memory)
+
+    # name of the backend the formula is admitted to, raises AdmissionRefused if there is none
+    def choose_backend(self, qbf: QBF, adaptive: bool = False) -> str:
+
+        estimate = estimate_cost(qbf, adaptive)
+        estimate.log()
+
+        for name in self.backends:
+
+            if name not in estimate.backends:
+                continue
+
+            if self._within_limits(estimate.backends[name]):
+                logger.info("Admitted the formula to the %s prover", name)
+                return name
+
+            logger.info("The estimate of the %s prover exceeds the limits", name)
+
+        raise AdmissionRefused("No prover backend among %s is estimated to stay within the limits" % (
+            ", ".join(self.backends)
+        ))
+
+    def make_prover(self, qbf: QBF, adaptive: bool = False) -> Prover:
+        return PROVER_BACKENDS[self.choose_backend(qbf, adaptive)].make_prover(qbf, adaptive)
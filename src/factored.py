@@ -0,0 +1,202 @@
+import sympy
+from qbf import QBF
+from prover import HonestProver, Prover, ProofOperator, _linearity_operator, _exists_operator, _evaluate_at
+
+
+def _depends_on(factor, symbol) -> bool:
+    return symbol in factor.gens and factor.degree(symbol) > 0
+
+
+def _expand(factors: list):
+
+    product = None
+
+    for factor, exponent in factors:
+        power = factor ** exponent
+        product = power if product is None else product * power
+
+    return product
+
+
+class FactoredPolynomial:
+
+    # product of constant * factor_1^e_1 * ... * factor_k^e_k where every factor is a sympy
+    # polynomial in the variables it depends on, factors untouched by an operator are shared
+    # between the polynomial before and after the operator
+    def __init__(self, factors: list, constant: int = 1):
+
+        self.constant = constant
+        self.factors = []
+
+        for factor, exponent in factors:
+
+            if not isinstance(factor, sympy.Poly):
+                # substituting the only variable of a factor results in a number
+                self.constant *= int(factor) ** exponent
+            elif factor.is_ground:
+                self.constant *= int(factor.LC()) ** exponent
+            else:
+                self.factors.append((factor, exponent))
+
+        # variable occurrence index, maps every symbol to the indices of the factors depending on it
+        self._occurrences = {}
+
+        for i, (factor, _) in enumerate(self.factors):
+            for symbol in factor.gens:
+                if _depends_on(factor, symbol):
+                    self._occurrences.setdefault(symbol, []).append(i)
+
+    def _split(self, symbol) -> tuple:
+
+        touched_indices = set(self._occurrences.get(symbol, []))
+
+        touched = [self.factors[i] for i in sorted(touched_indices)]
+        untouched = [f for i, f in enumerate(self.factors) if i not in touched_indices]
+
+        return touched, untouched
+
+    def degree(self, symbol) -> int:
+        return sum(factor.degree(symbol) * exponent for factor, exponent in self._split(symbol)[0])
+
+    def total_degree(self) -> int:
+        return sum(factor.total_degree() * exponent for factor, exponent in self.factors)
+
+    def is_ground(self) -> bool:
+        return len(self.factors) == 0
+
+    def as_expr(self):
+        return self.constant * sympy.Mul(*(factor.as_expr() ** exponent for factor, exponent in self.factors))
+
+    def linearize(self, symbol):
+
+        if self.degree(symbol) <= 1:
+            # the linearity operator does not change polynomials of degree at most 1
+            return self
+
+        touched, untouched = self._split(symbol)
+
+        return FactoredPolynomial(
+            untouched + [(_linearity_operator(_expand(touched), symbol), 1)],
+            self.constant
+        )
+
+    def exists(self, symbol):
+
+        touched, untouched = self._split(symbol)
+
+        if len(touched) == 0:
+            return FactoredPolynomial(untouched, 2 * self.constant)
+
+        return FactoredPolynomial(
+            untouched + [(_exists_operator(_expand(touched), symbol), 1)],
+            self.constant
+        )
+
+    def forall(self, symbol):
+
+        touched, untouched = self._split(symbol)
+
+        # factors that do not depend on the variable are squared,
+        # the others are split into their values at 0 and at 1
+        factors = [(factor, 2 * exponent) for factor, exponent in untouched]
+
+        for factor, exponent in touched:
+            factors.append((factor.eval(symbol, 0), exponent))
+            factors.append((factor.eval(symbol, 1), exponent))
+
+        return FactoredPolynomial(factors, self.constant ** 2)
+
+    def trunc(self, p: int):
+        return FactoredPolynomial(
+            [(factor.trunc(p), exponent) for factor, exponent in self.factors],
+            self.constant % p
+        )
+
+    # value at the given point, symbols the polynomial does not depend on are ignored
+    def evaluate(self, values: dict, p: int) -> int:
+
+        result = self.constant % p
+
+        for factor, exponent in self.factors:
+            result = result * pow(_evaluate_at(factor, values), exponent, p) % p
+
+        return result
+
+    # univariate polynomial in symbol, obtained by substituting the values of all other variables
+    def evaluate_partially(self, values: dict, symbol, p: int):
+
+        result = sympy.Poly(self.constant % p, symbol, domain=sympy.ZZ)
+
+        for factor, exponent in self.factors:
+
+            if not _depends_on(factor, symbol):
+                result *= pow(_evaluate_at(factor, values), exponent, p)
+                continue
+
+            s = factor.eval({x: a for x, a in values.items() if x in factor.gens and x != symbol})
+            result = (result * s.as_poly(symbol) ** exponent).trunc(p)
+
+        return result.trunc(p)
+
+
+# keeps P_phi as a product of clause factors, operators only expand
+# the factors that depend on the variable they act on
+class FactoredProver(HonestProver):
+
+    def _arithmetize(self):
+        return FactoredPolynomial([(factor, 1) for factor in self.qbf.arithmetize_clauses()])
+
+    def _apply_operator(self, poly: FactoredPolynomial, operator: ProofOperator):
+
+        if operator.is_linearity_operator():
+            return poly.linearize(self.qbf.get_symbol(operator.lv))
+
+        if self.qbf.get_quantification(operator.v) == QBF.Q_FORALL:
+            return poly.forall(self.qbf.get_symbol(operator.v))
+
+        return poly.exists(self.qbf.get_symbol(operator.v))
+
+    def _polynomial_value(self, poly: FactoredPolynomial) -> int:
+        assert poly.is_ground(), "Polynomial at the end of the protocol is not trivial"
+        return poly.constant
+
+    # the terms of the factors, the product is not expanded, a constant counts as a single term
+    def _describe_polynomial(self, poly: FactoredPolynomial) -> tuple:
+        return max(sum(len(factor.terms()) for factor, _ in poly.factors), 1), \
+            sum(factor.total_degree() * exponent for factor, exponent in poly.factors)
+
+    def _reduce_polynomial(self, poly: FactoredPolynomial):
+        return poly.trunc(self.p)
+
+    def _random_choice_values(self, operator: ProofOperator, random_choices: dict) -> dict:
+        return {
+            self.qbf.get_symbol(variable): a
+            for variable, a in random_choices.items()
+            if not operator.is_linearity_operator_on(variable)
+        }
+
+    def _get_operator_polynomial(self, operator: ProofOperator, random_choices: dict):
+        return self._polynomial_after_operator[operator].evaluate_partially(
+            self._random_choice_values(operator, random_choices),
+            self.qbf.get_symbol(operator.get_primary_variable()),
+            self.p
+        )
+
+    def _get_operator_evaluations(self, operator: ProofOperator, random_choices: dict, degree: int) -> list:
+
+        poly = self._polynomial_after_operator[operator]
+
+        values = self._random_choice_values(operator, random_choices)
+        symbol = self.qbf.get_symbol(operator.get_primary_variable())
+
+        return [poly.evaluate({**values, symbol: x}, self.p) for x in range(degree + 1)]
+
+    def _get_operator_evaluation_matrix(self, operator: ProofOperator, random_choices: dict,
+                                        degree: int, repetitions: int):
+        return Prover._get_operator_evaluation_matrix(self, operator, random_choices, degree, repetitions)
+
+    def eval_polynomial_after_operator(self, var_values: dict, operator: ProofOperator) -> int:
+        return self._polynomial_after_operator[operator].evaluate(
+            {self.qbf.get_symbol(variable): a for variable, a in var_values.items()},
+            self.p
+        )
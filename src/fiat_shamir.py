@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from qbf import QBF
+from circuit import CircuitQBF
+from prime import is_prime
+from prover import Prover, ProofOperator
+from verifier import ChallengeSource, run_verifier
+from interpolation import EvaluationForm
+
+PROOF_FORMAT_VERSION = 1
+
+# the honest prover picks the first prime above the lower bound modulo which the value does not vanish,
+# so it never needs many more bits than the lower bound, larger primes are rejected
+PROOF_PRIME_EXTRA_BITS = 8
+
+_DOMAIN_SEPARATOR = b"tqbfip-fiat-shamir-v1"
+
+logger = logging.getLogger("protocol")
+
+
+def _canonical_bytes(obj) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+class FiatShamirChallenges(ChallengeSource):
+
+    # the random choices are derived from a hash of the formula, p, the claimed value
+    # and the transcript so far, so that the prover can simulate the verifier on its own
+    def __init__(self, qbf: QBF, p: int, c: int):
+        self._state = hashlib.sha256(
+            _DOMAIN_SEPARATOR + _canonical_bytes({"formula": qbf.to_dict(), "p": p, "c": c})
+        ).digest()
+
+    def draw(self, operator: ProofOperator, s, p: int) -> int:
+        assert isinstance(s, EvaluationForm), "Fiat-Shamir challenges require evaluation form messages"
+
+        self._state = hashlib.sha256(
+            self._state + _canonical_bytes([operator.v, operator.lv, s.values])
+        ).digest()
+
+        # squeeze 128 bits more than needed, so that the reduction modulo p is close to uniform
+        needed_bytes = (p.bit_length() + 128 + 7) // 8
+
+        stream = b""
+        counter = 0
+
+        while len(stream) < needed_bytes:
+            stream += hashlib.sha256(self._state + counter.to_bytes(8, "big")).digest()
+            counter += 1
+
+        return int.from_bytes(stream[:needed_bytes], "big") % p
+
+
+class _RecordingProver(Prover):
+
+    def __init__(self, prover: Prover):
+        super().__init__(prover.qbf, prover.p)
+        self._prover = prover
+        self.rounds = []
+
+    def get_value_of_entire_polynomial(self) -> int:
+        return self._prover.get_value_of_entire_polynomial()
+
+    def get_operator_evaluations(self, operator: ProofOperator, random_choices: dict, degree: int) -> list:
+        values = self._prover.get_operator_evaluations(operator, random_choices, degree)
+        self.rounds.append(values)
+        return values
+
+
+# json booleans are parsed as bool, which is a subclass of int
+def _is_integer(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class _TranscriptProver(Prover):
+
+    # replays the messages recorded in a proof, in order
+    def __init__(self, qbf: QBF, p: int, c: int, rounds: list):
+        super().__init__(qbf, p)
+        self._c = c
+        self._rounds = rounds
+        self._next_round = 0
+
+    def get_value_of_entire_polynomial(self) -> int:
+        return self._c
+
+    def get_operator_evaluations(self, operator: ProofOperator, random_choices: dict, degree: int) -> list:
+
+        if self._next_round >= len(self._rounds):
+            return []
+
+        values = self._rounds[self._next_round]
+        self._next_round += 1
+
+        if not isinstance(values, list) or not all(_is_integer(v) for v in values):
+            return []
+
+        return values
+
+    def is_exhausted(self) -> bool:
+        return self._next_round == len(self._rounds)
+
+
+def generate_proof(qbf: QBF, /, prover: Prover) -> dict:
+
+    c = prover.get_value_of_entire_polynomial()
+
+    recording_prover = _RecordingProver(prover)
+
+    run_verifier(qbf, recording_prover, prover.p,
+                 evaluation_form=True, challenges=FiatShamirChallenges(qbf, prover.p, c))
+
+    return {
+        "version": PROOF_FORMAT_VERSION,
+        "formula": qbf.to_dict(),
+        "p": prover.p,
+        "c": c,
+        "rounds": recording_prover.rounds
+    }
+
+
+def verify_proof(proof: dict) -> bool:
+
+    if proof.get("version") != PROOF_FORMAT_VERSION:
+        return False
+
+    # circuit formulas are stored with their gates instead of clauses
+    qbf = CircuitQBF.from_dict(proof["formula"]) if "gates" in proof["formula"] else QBF.from_dict(proof["formula"])
+    p = proof["p"]
+    c = proof["c"]
+
+    if not _is_integer(p) or not _is_integer(c) or not isinstance(proof["rounds"], list):
+        return False
+
+    lower_bound = qbf.get_lower_bound_for_protocol_prime()
+
+    # the prime is chosen by the prover, the verifier only has to make sure it is large enough,
+    # and small enough for the primality test, which is trial division, to finish quickly
+    if p < lower_bound or p.bit_length() > lower_bound.bit_length() + PROOF_PRIME_EXTRA_BITS or not is_prime(p):
+        return False
+
+    prover = _TranscriptProver(qbf, p, c, proof["rounds"])
+
+    accepted = run_verifier(qbf, prover, p,
+                            evaluation_form=True, challenges=FiatShamirChallenges(qbf, p, c))
+
+    return accepted and prover.is_exhausted()
+
+
+def write_proof(path: str, proof: dict):
+    with open(path, "w") as f:
+        json.dump(proof, f, separators=(",", ":"))
+
+
+def read_proof(path: str) -> dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def verify_proof_file(path: str) -> bool:
+
+    try:
+        return verify_proof(read_proof(path))
+    except (OSError, ValueError, KeyError, TypeError, RuntimeError) as e:
+        logger.info("[V]: Could not verify proof file %s: %s", path, e)
+        return False
+
+
+# verify many proof files in parallel, the result contains one flag per path, in order
+def verify_proof_files(paths: list, /, *, processes: int = None, chunksize: int = 16) -> list:
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(verify_proof_file, paths, chunksize=chunksize))
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) >= 3 and sys.argv[1] == "prove":
+
+        from formulas import default_example_formula
+        from prover import HonestProver
+
+        qbf = default_example_formula()
+
+        write_proof(sys.argv[2], generate_proof(qbf, HonestProver(qbf)))
+
+        print("Proof written to %s" % sys.argv[2])
+
+    elif len(sys.argv) >= 3 and sys.argv[1] == "verify":
+
+        for proof_path, accepted in zip(sys.argv[2:], verify_proof_files(sys.argv[2:])):
+            print("%s: %s" % (proof_path, "accepted" if accepted else "rejected"))
+
+    else:
+        print("Usage: python fiat_shamir.py prove <proof file>")
+        print("       python fiat_shamir.py verify <proof file> [<proof file> ...]")
@@ -1,4 +1,5 @@
 from qbf import *
+from circuit import CircuitQBF
 
 
 def default_example_formula():
@@ -118,3 +119,23 @@ def prime_eval_formula():
     qbf.add_clause({-y, -z})
 
     return qbf
+
+
+# for all x, y, z there is a w equal to their parity, the matrix is a circuit,
+# as a CNF, the parity would need either eight clauses or auxiliary variables
+def parity_circuit_formula():
+
+    qbf = CircuitQBF()
+
+    x, y, z, w = range(1, 5)
+
+    qbf.add_variable(x, QBF.Q_FORALL, "x")
+    qbf.add_variable(y, QBF.Q_FORALL, "y")
+    qbf.add_variable(z, QBF.Q_FORALL, "z")
+    qbf.add_variable(w, QBF.Q_EXISTS, "w")
+
+    parity = qbf.add_gate(CircuitQBF.GATE_XOR, qbf.get_input(x), qbf.get_input(y), qbf.get_input(z))
+
+    qbf.set_output(qbf.add_gate(CircuitQBF.GATE_NOT, qbf.add_gate(CircuitQBF.GATE_XOR, parity, qbf.get_input(w))))
+
+    return qbf
@@ -0,0 +1,485 @@
+import logging
+from collections import deque
+from qbf import QBF
+from circuit import CircuitQBF
+
+logger = logging.getLogger("prover")
+
+
+# abstract syntax of quantified boolean formulas that are neither required to be in prenex form
+# nor to have a matrix in CNF, formulas can be combined with the operators &, | and ~
+class Formula:
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+
+class Variable(Formula):
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class Not(Formula):
+
+    def __init__(self, operand: Formula):
+        self.operand = operand
+
+
+class And(Formula):
+
+    # the conjunction of no operands is true
+    def __init__(self, *operands: Formula):
+        self.operands = operands
+
+
+class Or(Formula):
+
+    # the disjunction of no operands is false
+    def __init__(self, *operands: Formula):
+        self.operands = operands
+
+
+class Exists(Formula):
+
+    def __init__(self, name: str, body: Formula):
+        self.name = name
+        self.body = body
+
+
+class Forall(Formula):
+
+    def __init__(self, name: str, body: Formula):
+        self.name = name
+        self.body = body
+
+
+class _Quantifier:
+
+    # a quantifier occurrence of the formula in NNF, parent is the quantifier it is nested in
+    def __init__(self, quantification: bool, name: str, parent):
+        self.quantification = quantification
+        self.name = name
+        self.parent = parent
+        self.children = []
+
+        # number of the variable in the order of occurrence
+        self.variable = None
+
+
+# negation normal form of the matrix as a DAG, every node is interned by its structure, so that identical
+# subformulas are represented by the same node, nodes are ("lit", literal), ("and", operands) and
+# ("or", operands), where the operands are the sorted ids of distinct nodes
+class _Matrix:
+
+    def __init__(self):
+        self.nodes = []
+        self._ids = {}
+
+    def _intern(self, key: tuple) -> int:
+
+        if key not in self._ids:
+            self._ids[key] = len(self.nodes)
+            self.nodes.append(key)
+
+        return self._ids[key]
+
+    def literal(self, literal: int) -> int:
+        return self._intern(("lit", literal))
+
+    def gate(self, kind: str, operands) -> int:
+
+        operands = tuple(sorted(set(operands)))
+
+        if len(operands) == 1:
+            return operands[0]
+
+        return self._intern((kind, operands))
+
+
+class _Converter:
+
+    def __init__(self):
+        self.matrix = _Matrix()
+        self.quantifiers = []
+        self.roots = []
+
+        # the results of subformulas are shared as long as they are reached
+        # with the same polarity and in the same scope of quantifiers
+        self._memo = {}
+
+    # the node of the formula in NNF, negated if positive is False, scope maps the names of
+    # the bound variables to the numbers of their quantifiers, parent is the innermost quantifier
+    # the formula is traversed without recursion, as formulas can be nested deeply
+    def convert(self, formula: Formula, positive: bool, scope: dict, parent) -> int:
+
+        # a task is a subformula to be converted, with the tasks of its operands
+        # once they have been pushed, which have to be finished first
+        stack = [(formula, positive, scope, parent, None)]
+
+        while len(stack) != 0:
+
+            formula, positive, scope, parent, operands = stack.pop()
+
+            key = (id(formula), positive, id(parent))
+
+            if operands is not None:
+                self._memo[key] = self._combine(formula, positive, [self._memo[task_key] for task_key in operands])
+                continue
+
+            if key in self._memo:
+                continue
+
+            if isinstance(formula, Variable):
+
+                if formula.name not in scope:
+                    raise ValueError("Variable %s is not bound by a quantifier" % formula.name)
+
+                variable = scope[formula.name]
+
+                self._memo[key] = self.matrix.literal(variable if positive else -variable)
+                continue
+
+            tasks = self._operand_tasks(formula, positive, scope, parent)
+
+            stack.append((formula, positive, scope, parent, [
+                (id(task[0]), task[1], id(task[3])) for task in tasks
+            ]))
+            stack.extend(tasks)
+
+        return self._memo[key]
+
+    def _operand_tasks(self, formula: Formula, positive: bool, scope: dict, parent) -> list:
+
+        if isinstance(formula, Not):
+            return [(formula.operand, not positive, scope, parent, None)]
+
+        if isinstance(formula, (And, Or)):
+            return [(operand, positive, scope, parent, None) for operand in formula.operands]
+
+        if isinstance(formula, (Exists, Forall)):
+
+            # the negation of a quantifier is the dual quantifier applied to the negated body
+            quantification = (isinstance(formula, Forall) == positive)
+
+            quantifier = _Quantifier(QBF.Q_FORALL if quantification else QBF.Q_EXISTS, formula.name, parent)
+            self.quantifiers.append(quantifier)
+
+            (parent.children if parent is not None else self.roots).append(quantifier)
+
+            # the quantifiers are numbered in the order of their occurrence, bound variables are renamed apart
+            return [(formula.body, positive, {**scope, formula.name: len(self.quantifiers)}, quantifier, None)]
+
+        raise ValueError("Unknown formula %s" % type(formula).__name__)
+
+    def _combine(self, formula: Formula, positive: bool, operands: list) -> int:
+
+        if isinstance(formula, (And, Or)):
+
+            # De Morgan, negation turns conjunctions into disjunctions and vice versa
+            kind = "and" if isinstance(formula, And) == positive else "or"
+
+            return self.matrix.gate(kind, operands)
+
+        return operands[0]
+
+
+# polarity-aware Tseitin encoding of the matrix, every subformula occurs positively in NNF, so only the
+# implication from an auxiliary variable to the subformula it stands for is encoded, the conjunctions of
+# the top level become clauses, as do the disjunctions of literals, and an operand of the same kind
+# with a single occurrence is merged into its parent, all other gates get an auxiliary variable
+class _Tseitin:
+
+    def __init__(self, matrix: _Matrix, root: int, first_auxiliary: int):
+        self.matrix = matrix
+        self.clauses = []
+        self.auxiliary = {}
+        self.next_variable = first_auxiliary
+
+        self._references = {}
+        self._count_references(root)
+
+        self._undefined = []
+
+        self._encode_top_level(root)
+        self._define_auxiliary_variables()
+
+    def _count_references(self, root: int):
+
+        stack = [root]
+        visited = {root}
+
+        while len(stack) != 0:
+
+            kind, operands = self.matrix.nodes[stack.pop()]
+
+            if kind == "lit":
+                continue
+
+            for operand in operands:
+
+                self._references[operand] = self._references.get(operand, 0) + 1
+
+                if operand not in visited:
+                    visited.add(operand)
+                    stack.append(operand)
+
+    # the operands of a gate, with the operands of merged gates of the same kind in their place
+    def _operands(self, node: int) -> list:
+
+        kind = self.matrix.nodes[node][0]
+
+        result = []
+        stack = [node]
+
+        while len(stack) != 0:
+
+            for operand in self.matrix.nodes[stack.pop()][1]:
+
+                if self.matrix.nodes[operand][0] == kind and self._references[operand] == 1:
+                    stack.append(operand)
+                else:
+                    result.append(operand)
+
+        return result
+
+    # the literal standing for the node, gates get an auxiliary variable, which is defined later
+    def _literal(self, node: int) -> int:
+
+        kind, operands = self.matrix.nodes[node]
+
+        if kind == "lit":
+            return operands
+
+        if node not in self.auxiliary:
+            self.auxiliary[node] = self.next_variable
+            self.next_variable += 1
+            self._undefined.append(node)
+
+        return self.auxiliary[node]
+
+    # clauses implying the gates from their auxiliary variables, defining a gate may introduce further ones
+    def _define_auxiliary_variables(self):
+
+        while len(self._undefined) != 0:
+
+            node = self._undefined.pop()
+            t = self.auxiliary[node]
+
+            if self.matrix.nodes[node][0] == "and":
+                for operand in self._operands(node):
+                    self._add_clause({-t, self._literal(operand)})
+            else:
+                self._add_clause({-t} | {self._literal(operand) for operand in self._operands(node)})
+
+    def _add_clause(self, clause: set):
+
+        # tautologies are always satisfied
+        if not any(-literal in clause for literal in clause):
+            self.clauses.append(clause)
+
+    def _encode_top_level(self, root: int):
+
+        kind = self.matrix.nodes[root][0]
+
+        # conjuncts of the top level, reached through conjunctions, each one becomes a clause
+        conjuncts = [root] if kind != "and" else []
+
+        stack = [root] if kind == "and" else []
+        visited = set(stack)
+
+        while len(stack) != 0:
+
+            for operand in self.matrix.nodes[stack.pop()][1]:
+
+                if operand in visited:
+                    continue
+
+                visited.add(operand)
+
+                if self.matrix.nodes[operand][0] == "and":
+                    stack.append(operand)
+                else:
+                    conjuncts.append(operand)
+
+        for conjunct in conjuncts:
+
+            if self.matrix.nodes[conjunct][0] == "or":
+                self._add_clause({self._literal(operand) for operand in self._operands(conjunct)})
+            else:
+                self._add_clause({self._literal(conjunct)})
+
+
+# linearization of the quantifier forest with the fewest quantifier blocks, starting with the given
+# quantification, all quantifiers of the current kind whose enclosing quantifiers are placed already
+# are placed next, then the kind alternates, quantifiers of unused variables are skipped
+def _prenex_order(roots: list, used: set, quantification: bool) -> list:
+
+    order = []
+    frontier = deque(roots)
+
+    while len(frontier) != 0:
+
+        postponed = deque()
+
+        while len(frontier) != 0:
+
+            quantifier = frontier.popleft()
+
+            if quantifier.variable in used and quantifier.quantification != quantification:
+                postponed.append(quantifier)
+                continue
+
+            if quantifier.variable in used:
+                order.append(quantifier)
+
+            frontier.extend(quantifier.children)
+
+        frontier = postponed
+        quantification = not quantification
+
+    return order
+
+
+def _count_blocks(order: list, innermost_existential: bool) -> int:
+
+    kinds = [quantifier.quantification for quantifier in order]
+
+    if innermost_existential:
+        kinds.append(QBF.Q_EXISTS)
+
+    return sum(1 for i, kind in enumerate(kinds) if i == 0 or kinds[i - 1] != kind)
+
+
+# the variables of the prefix, followed by the given number of existential auxiliary variables, are
+# added to the formula in the order with the fewest quantifier blocks, variables bound more than once
+# get distinct names, returns the map from the numbers of the quantifiers and the auxiliary variables
+# (which continue after them) to the variables of the formula
+def _add_prefix(qbf: QBF, converter: _Converter, used: set, auxiliary_count: int) -> dict:
+
+    order = min(
+        (_prenex_order(converter.roots, used, quantification) for quantification in (QBF.Q_EXISTS, QBF.Q_FORALL)),
+        key=lambda candidate: _count_blocks(candidate, auxiliary_count != 0)
+    )
+
+    renumbering = {}
+    names = set()
+    # the last suffix given to every name
+    suffixes = {}
+
+    def add_variable(variable: int, quantification: bool, name: str):
+
+        unique_name = name
+
+        while unique_name in names:
+            suffixes[name] = suffixes.get(name, 1) + 1
+            unique_name = "%s_%d" % (name, suffixes[name])
+
+        names.add(unique_name)
+
+        renumbering[variable] = len(renumbering) + 1
+        qbf.add_variable(renumbering[variable], quantification, unique_name)
+
+    for quantifier in order:
+        add_variable(quantifier.variable, quantifier.quantification, quantifier.name)
+
+    for t in range(len(converter.quantifiers) + 1, len(converter.quantifiers) + auxiliary_count + 1):
+        add_variable(t, QBF.Q_EXISTS, "t")
+
+    # the protocol needs at least one variable, if the matrix is constant,
+    # the formula gets a variable that the matrix does not depend on
+    if qbf.get_variable_count() == 0:
+        qbf.add_variable(1, QBF.Q_EXISTS, "x")
+
+    return renumbering
+
+
+def _convert(formula: Formula) -> tuple:
+
+    converter = _Converter()
+
+    root = converter.convert(formula, True, {}, None)
+
+    for variable, quantifier in enumerate(converter.quantifiers, start=1):
+        quantifier.variable = variable
+
+    return converter, root
+
+
+# the formula in prenex normal form with its matrix in CNF, with the same truth value as the given formula,
+# which has to be closed, that is, every variable has to be bound by a quantifier
+# identical subformulas share their auxiliary variable, which are existentially quantified after all
+# variables of the formula, and quantifiers of variables that do not occur in the matrix are dropped
+def to_qbf(formula: Formula) -> QBF:
+
+    converter, root = _convert(formula)
+
+    tseitin = _Tseitin(converter.matrix, root, len(converter.quantifiers) + 1)
+
+    used = set(abs(literal) for clause in tseitin.clauses for literal in clause)
+
+    qbf = QBF()
+
+    renumbering = _add_prefix(qbf, converter, used, len(tseitin.auxiliary))
+
+    for clause in tseitin.clauses:
+        qbf.add_clause({renumbering[abs(literal)] * (1 if literal >= 1 else -1) for literal in clause})
+
+    logger.info("Encoded the formula with %d variables, %d of which are auxiliary, and %d clauses",
+                qbf.get_variable_count(), len(tseitin.auxiliary), qbf.get_clause_count())
+
+    return qbf
+
+
+# the formula in prenex normal form with its matrix as a circuit, which consists of the gates of the matrix
+# in NNF, no auxiliary variables are needed, identical subformulas are represented by the same gate
+def to_circuit_qbf(formula: Formula) -> CircuitQBF:
+
+    converter, root = _convert(formula)
+
+    # nodes are interned after their operands, so the operands of every node precede it
+    reachable = {root}
+
+    for node in range(root, -1, -1):
+
+        kind, operands = converter.matrix.nodes[node]
+
+        if node in reachable and kind != "lit":
+            reachable.update(operands)
+
+    used = set(
+        abs(converter.matrix.nodes[node][1]) for node in reachable if converter.matrix.nodes[node][0] == "lit"
+    )
+
+    qbf = CircuitQBF()
+
+    renumbering = _add_prefix(qbf, converter, used, 0)
+
+    gates = {}
+
+    for node in sorted(reachable):
+
+        kind, operands = converter.matrix.nodes[node]
+
+        if kind == "lit":
+            gates[node] = qbf.get_input(renumbering[abs(operands)])
+
+            if operands < 0:
+                gates[node] = qbf.add_gate(CircuitQBF.GATE_NOT, gates[node])
+
+        else:
+            gates[node] = qbf.add_gate(
+                CircuitQBF.GATE_AND if kind == "and" else CircuitQBF.GATE_OR, *(gates[operand] for operand in operands)
+            )
+
+    qbf.set_output(gates[root])
+
+    logger.info("Encoded the formula with %d variables and %d gates", qbf.get_variable_count(), qbf.get_gate_count())
+
+    return qbf
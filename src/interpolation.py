@@ -0,0 +1,135 @@
+from functools import lru_cache
+import numpy as np
+import sympy
+
+
+# barycentric weights for the interpolation nodes 0, 1, ..., degree modulo p, that is
+# w_j = 1 / prod_{m != j} (j - m) = (-1)^(degree - j) / (j! * (degree - j)!)
+@lru_cache(maxsize=None)
+def barycentric_weights(degree: int, p: int) -> tuple:
+    assert 0 <= degree < p
+
+    factorials = [1] * (degree + 1)
+
+    for i in range(1, degree + 1):
+        factorials[i] = factorials[i - 1] * i % p
+
+    weights = []
+
+    for j in range(degree + 1):
+        w = pow(factorials[j] * factorials[degree - j] % p, -1, p)
+        weights.append(w if (degree - j) % 2 == 0 else (p - w) % p)
+
+    return tuple(weights)
+
+
+# amount of values the prover has to send for a polynomial of the given degree,
+# the nodes 0, ..., degree have to be pairwise distinct modulo p
+def evaluation_point_count(degree_bound: int, p: int) -> int:
+    return min(degree_bound, p - 1) + 1
+
+
+# numpy array of field elements modulo p, products of two elements
+# must not overflow, so large primes fall back to python integers
+def field_array(values, p: int):
+    return np.array(values, dtype=np.int64 if p < (1 << 31) else object)
+
+
+class EvaluationForm:
+
+    # univariate polynomial over F_p given by its values at 0, 1, ..., len(values) - 1
+    def __init__(self, values: list, p: int):
+        assert 1 <= len(values) <= p
+        self.values = [v % p for v in values]
+        self.p = p
+
+    def __str__(self):
+        return "[%s]" % ", ".join(str(v) for v in self.values)
+
+    def degree(self) -> int:
+        # degree of the interpolating polynomial is at most this number
+        return len(self.values) - 1
+
+    def evaluate(self, x: int) -> int:
+
+        x %= self.p
+
+        d = self.degree()
+
+        if x <= d:
+            return self.values[x]
+
+        weights = barycentric_weights(d, self.p)
+
+        # prod_{m != j} (x - m) via prefix and suffix products, so that no inversions are needed
+        suffix = [1] * (d + 2)
+
+        for m in range(d, -1, -1):
+            suffix[m] = suffix[m + 1] * (x - m) % self.p
+
+        result = 0
+        prefix = 1
+
+        for j in range(d + 1):
+            result += weights[j] * self.values[j] % self.p * prefix * suffix[j + 1]
+            prefix = prefix * (x - j) % self.p
+
+        return result % self.p
+
+    def to_poly(self, symbol):
+
+        d = self.degree()
+
+        weights = barycentric_weights(d, self.p)
+
+        # coefficients of prod_{m} (X - m), lowest degree first
+        node_poly = [1]
+
+        for m in range(d + 1):
+            node_poly = [
+                ((node_poly[i - 1] if i >= 1 else 0) - m * (node_poly[i] if i < len(node_poly) else 0)) % self.p
+                for i in range(len(node_poly) + 1)
+            ]
+
+        coefficients = [0] * (d + 1)
+
+        for j in range(d + 1):
+
+            scale = weights[j] * self.values[j] % self.p
+
+            if scale == 0:
+                continue
+
+            # divide prod_{m} (X - m) by (X - j) using synthetic division
+            carry = 0
+
+            for i in range(d + 1, 0, -1):
+                carry = (node_poly[i] + j * carry) % self.p
+                coefficients[i - 1] = (coefficients[i - 1] + scale * carry) % self.p
+
+        return sympy.Poly(list(reversed(coefficients)), symbol, domain=sympy.ZZ).trunc(self.p)
+
+
+# evaluate many polynomials given in evaluation form at once, row i of values
+# holds the values of the i-th polynomial at 0, 1, ..., d and is evaluated at xs[i]
+def evaluate_many(values, xs, p: int):
+
+    d = values.shape[1] - 1
+
+    weights = barycentric_weights(d, p)
+
+    # Lagrange form sum_j w_j * y_j * prod_{m != j} (x - m), which is also correct at the nodes
+    suffix = [None] * (d + 2)
+    suffix[d + 1] = xs * 0 + 1
+
+    for m in range(d, -1, -1):
+        suffix[m] = suffix[m + 1] * ((xs - m) % p) % p
+
+    result = xs * 0
+    prefix = xs * 0 + 1
+
+    for j in range(d + 1):
+        result = (result + weights[j] * values[:, j] % p * prefix % p * suffix[j + 1]) % p
+        prefix = prefix * ((xs - j) % p) % p
+
+    return result
@@ -0,0 +1,74 @@
+import logging
+from collections import Counter, OrderedDict
+from qbf import QBF
+
+logger = logging.getLogger("prover")
+
+
+# matrix arithmetizations P_phi of earlier formulas, keyed by the names and quantifications of
+# their variables, the arithmetization of an edited version of a formula is obtained from the one
+# of the version seen last by multiplying it with the factors of the added clauses and dividing
+# it by the factors of the removed ones, at most max_entries formulas are kept
+class MatrixCache:
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def arithmetize(self, qbf: QBF):
+
+        if not qbf.has_cnf_matrix():
+            raise ValueError("The matrix cache only applies to formulas whose matrix is in CNF")
+
+        key = tuple(
+            (qbf.get_name(v), qbf.get_quantification(v)) for v in range(1, qbf.get_variable_count() + 1)
+        )
+
+        clauses = Counter(frozenset(clause) for clause in qbf.get_clauses())
+
+        poly = None
+
+        if key in self._entries:
+
+            previous_clauses, previous = self._entries[key]
+
+            added = clauses - previous_clauses
+            removed = previous_clauses - clauses
+
+            edits = sum(added.values()) + sum(removed.values())
+
+            # the factor of the empty clause is 0, which can not be divided by,
+            # and if most clauses have changed, starting from scratch is cheaper
+            if all(len(clause) != 0 for clause in removed) and edits < sum(clauses.values()):
+
+                poly = previous
+
+                for clause in removed.elements():
+                    poly = poly.exquo(qbf.arithmetize_clause(clause))
+
+                for clause in added.elements():
+                    poly = poly * qbf.arithmetize_clause(clause)
+
+                logger.info("Obtained the matrix arithmetization from the previous version of the formula "
+                            "by adding %d and removing %d clauses", sum(added.values()), sum(removed.values()))
+
+        if poly is None:
+            self.misses += 1
+            poly = qbf.arithmetize_matrix()
+        else:
+            self.hits += 1
+
+        self._entries[key] = (clauses, poly)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        return poly
@@ -0,0 +1,234 @@
+import numpy as np
+import sympy
+
+# polynomials in more variables are not converted, their coefficient arrays would be too large
+MAX_MULTILINEAR_VARIABLES = 20
+MAX_QUADRATIC_VARIABLES = 12
+
+# polynomials with fewer terms than this fraction of the 2^k multilinear monomials are not converted,
+# most entries of their coefficient arrays would be zero
+MIN_MULTILINEAR_DENSITY = 1 / 16
+
+
+def _coefficient_array(values: list, p: int = None):
+    # without a modulus the coefficients are kept as exact integers
+    if p is None:
+        return np.array(values, dtype=object)
+    return np.array([value % p for value in values], dtype=np.int64 if p < 2 ** 31 else object)
+
+
+def is_multilinear(poly) -> bool:
+    return all(degree <= 1 for degree in poly.degree_list())
+
+
+class MultilinearPolynomial:
+
+    # polynomial that is multilinear in the given symbols, the coefficient of the monomial
+    # consisting of the symbols whose bits are set in mask is stored at coefficients[mask],
+    # symbols[i] corresponds to the bit 1 << i
+    def __init__(self, symbols: list, coefficients, p: int = None):
+        assert len(coefficients) == 1 << len(symbols)
+
+        self.symbols = list(symbols)
+        self.coefficients = coefficients
+        self.p = p
+
+        self._poly = None
+
+    @staticmethod
+    def from_poly(poly, p: int = None):
+        assert is_multilinear(poly)
+
+        symbols = list(poly.gens)
+        values = [0] * (1 << len(symbols))
+
+        for monom, coefficient in poly.terms():
+            values[sum(1 << i for i, e in enumerate(monom) if e != 0)] = int(coefficient)
+
+        return MultilinearPolynomial(symbols, _coefficient_array(values, p), p)
+
+    def _reduce(self, array):
+        return array if self.p is None else array % self.p
+
+    def _halves(self, symbol) -> tuple:
+        # coefficients of the monomials without and with the symbol
+        cube = self.coefficients.reshape(-1, 2, 1 << self.symbols.index(symbol))
+        return cube[:, 0, :].reshape(-1), cube[:, 1, :].reshape(-1)
+
+    # the polynomial with the given coefficients of the monomials without the symbol
+    def _eliminate(self, symbol, coefficients):
+
+        if len(self.symbols) == 1:
+            # keep the symbol, so that the polynomial can still be converted to a sympy one
+            return MultilinearPolynomial(self.symbols, _coefficient_array([coefficients[0], 0], self.p), self.p)
+
+        return MultilinearPolynomial([s for s in self.symbols if s != symbol], coefficients, self.p)
+
+    def is_ground(self) -> bool:
+        return not np.any(self.coefficients[1:] != 0)
+
+    def constant(self) -> int:
+        assert self.is_ground()
+        return int(self.coefficients[0])
+
+    # the polynomial with the given value substituted for the symbol
+    def substitute(self, symbol, value: int):
+
+        if symbol not in self.symbols:
+            return self
+
+        without, with_ = self._halves(symbol)
+
+        return self._eliminate(symbol, self._reduce(without + value * with_))
+
+    # sum of the polynomial at symbol = 0 and symbol = 1
+    def exists(self, symbol):
+
+        if symbol not in self.symbols:
+            return MultilinearPolynomial(self.symbols, self._reduce(2 * self.coefficients), self.p)
+
+        without, with_ = self._halves(symbol)
+
+        return self._eliminate(symbol, self._reduce(2 * without + with_))
+
+    # product of the polynomial at symbol = 0 and symbol = 1, of degree at most 2 in every symbol
+    def forall(self, symbol):
+        return QuadraticPolynomial.product(self.substitute(symbol, 0), self.substitute(symbol, 1))
+
+    def to_poly(self):
+
+        if self._poly is None:
+
+            terms = {
+                tuple((mask >> i) & 1 for i in range(len(self.symbols))): int(coefficient)
+                for mask, coefficient in enumerate(self.coefficients) if coefficient != 0
+            }
+
+            if len(terms) == 0:
+                self._poly = sympy.Poly(0, *self.symbols, domain=sympy.ZZ)
+            else:
+                self._poly = sympy.Poly.from_dict(terms, *self.symbols, domain=sympy.ZZ).exclude()
+
+        return self._poly
+
+
+
+
+# polynomial of degree at most 2 in each of the given symbols, such as the product of two multilinear
+# polynomials, the coefficients form an array with an axis of length 3 per symbol, indexed by the
+# exponent, symbols[i] corresponds to the axis k - 1 - i, so that the entries of degree at most 1
+# are laid out like the coefficients of a MultilinearPolynomial
+class QuadraticPolynomial:
+
+    def __init__(self, symbols: list, coefficients, p: int = None):
+        assert coefficients.shape == (3,) * len(symbols)
+
+        self.symbols = list(symbols)
+        self.coefficients = coefficients
+        self.p = p
+
+        self._poly = None
+
+    # the product is interpolated from the values of both factors on {0, 1, 2}^k
+    @staticmethod
+    def product(a: MultilinearPolynomial, b: MultilinearPolynomial):
+        assert a.symbols == b.symbols and a.p == b.p
+
+        shape = (2,) * len(a.symbols)
+
+        values = _evaluate_on_grid(a.coefficients.reshape(shape), a.p) * \
+            _evaluate_on_grid(b.coefficients.reshape(shape), a.p)
+
+        if a.p is not None:
+            values %= a.p
+
+        return QuadraticPolynomial(a.symbols, _interpolate_on_grid(values, a.p), a.p)
+
+    # the linearity operator turns the square of the symbol into the symbol itself,
+    # once no square is left, the result is returned as a MultilinearPolynomial
+    def linearize(self, symbol):
+
+        if symbol not in self.symbols:
+            return self
+
+        coefficients = self.coefficients.copy()
+
+        cube = np.moveaxis(coefficients, len(self.symbols) - 1 - self.symbols.index(symbol), 0)
+        cube[1] += cube[2]
+        cube[2] = 0
+
+        if self.p is not None:
+            cube[1] %= self.p
+
+        multilinear = coefficients[(slice(0, 2),) * len(self.symbols)]
+
+        if np.count_nonzero(multilinear) == np.count_nonzero(coefficients):
+            return MultilinearPolynomial(self.symbols, multilinear.reshape(-1).copy(), self.p)
+
+        return QuadraticPolynomial(self.symbols, coefficients, self.p)
+
+    def is_ground(self) -> bool:
+        return not np.any(self.coefficients.reshape(-1)[1:] != 0)
+
+    def constant(self) -> int:
+        assert self.is_ground()
+        return int(self.coefficients.flat[0])
+
+    # exponents of the symbols of every term, with the coefficient
+    def _terms(self):
+        for index in zip(*np.nonzero(self.coefficients)):
+            yield tuple(int(e) for e in reversed(index)), int(self.coefficients[index])
+
+    def to_poly(self):
+
+        if self._poly is None:
+
+            terms = dict(self._terms())
+
+            if len(terms) == 0:
+                self._poly = sympy.Poly(0, *self.symbols, domain=sympy.ZZ)
+            else:
+                self._poly = sympy.Poly.from_dict(terms, *self.symbols, domain=sympy.ZZ).exclude()
+
+        return self._poly
+
+
+# values of a polynomial of degree at most 1 along every axis at the points 0, 1 and 2 of every axis
+def _evaluate_on_grid(coefficients, p: int = None):
+
+    values = coefficients
+
+    for axis in range(values.ndim):
+
+        c = np.moveaxis(values, axis, 0)
+        values = np.moveaxis(np.stack([c[0], c[0] + c[1], c[0] + 2 * c[1]]), 0, axis)
+
+        if p is not None:
+            values %= p
+
+    return values
+
+
+# coefficients of the polynomial of degree at most 2 along every axis taking the given values
+# at the points 0, 1 and 2 of every axis, the second difference f(2) - 2 f(1) + f(0) is twice
+# the coefficient of the square
+def _interpolate_on_grid(values, p: int = None):
+
+    coefficients = values
+
+    for axis in range(coefficients.ndim):
+
+        f = np.moveaxis(coefficients, axis, 0)
+        square = f[2] - 2 * f[1] + f[0]
+
+        if p is None:
+            square = square // 2
+        else:
+            square = square % p * ((p + 1) // 2) % p
+
+        coefficients = np.moveaxis(np.stack([f[0], f[1] - f[0] - square, square]), 0, axis)
+
+        if p is not None:
+            coefficients %= p
+
+    return coefficients
@@ -0,0 +1,163 @@
+import queue
+import threading
+from prover import ProofOperator
+from verifier import ProtocolObserver
+
+# what happens to the events of a round if the queue of an observer is full: the protocol waits for the
+# observer (block), the event is not delivered (drop), or only every sample_every-th round is delivered
+# at all, waiting for the observer if necessary (sample), handshakes and terminations are always delivered
+BACKPRESSURE_BLOCK = "block"
+BACKPRESSURE_DROP = "drop"
+BACKPRESSURE_SAMPLE = "sample"
+
+# put into a queue to stop its worker
+_STOP = object()
+
+# the method of the event setting the prime of an observer, which happens in the thread of its worker
+_SET_PRIME = object()
+
+
+class _ObserverWorker:
+
+    def __init__(self, observer: ProtocolObserver, queue_size: int):
+        self.observer = observer
+        self.queue = queue.Queue(queue_size)
+        self.error = None
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+
+        while True:
+
+            event = self.queue.get()
+
+            try:
+                if event is _STOP:
+                    return
+
+                # once the observer has failed, further events are discarded
+                if self.error is None:
+                    method, args = event
+
+                    if method is _SET_PRIME:
+                        self.observer.p = args[0]
+                    else:
+                        getattr(self.observer, method)(*args)
+
+            except Exception as e:
+                self.error = e
+
+            finally:
+                self.queue.task_done()
+
+
+# delivers the events of a protocol session to any number of observers, each of which runs in a
+# background thread with a bounded queue of at most queue_size events, so the protocol does not wait
+# for the observers, unless a queue is full and the backpressure policy says so
+# close the bus (or use it as a context manager) to wait for all events to be delivered
+class ObserverBus(ProtocolObserver):
+
+    def __init__(self, observers: list, *, queue_size: int = 64, backpressure: str = BACKPRESSURE_BLOCK,
+                 sample_every: int = 10):
+
+        if backpressure not in (BACKPRESSURE_BLOCK, BACKPRESSURE_DROP, BACKPRESSURE_SAMPLE):
+            raise ValueError("Unknown backpressure policy '%s'" % backpressure)
+
+        assert queue_size >= 1 and sample_every >= 1
+
+        self.backpressure = backpressure
+        self.sample_every = sample_every
+
+        # number of round events not delivered to an observer, summed over the observers
+        self.dropped = 0
+
+        self._rounds = 0
+        self._closed = False
+
+        self._workers = [_ObserverWorker(observer, queue_size) for observer in observers]
+
+        # the prime of the observers is only set once the verifier has chosen it
+        self._p = None
+
+    # the verifier sets the prime before the handshake, the observers get it before any later event
+    @property
+    def p(self):
+        return self._p
+
+    @p.setter
+    def p(self, p: int):
+        self._p = p
+        self._publish(_SET_PRIME, (p,), False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _publish(self, method, args: tuple, may_drop: bool):
+
+        if self._closed:
+            raise RuntimeError("The observer bus has been closed")
+
+        for worker in self._workers:
+
+            if not may_drop:
+                worker.queue.put((method, args))
+                continue
+
+            try:
+                worker.queue.put_nowait((method, args))
+            except queue.Full:
+                self.dropped += 1
+
+    def on_handshake(self, p: int, initial_c: int):
+        self._publish("on_handshake", (p, initial_c), False)
+
+    def on_new_round(self,
+                     current_operator: ProofOperator,
+                     s,
+                     prev_c: int,
+                     new_rc: dict,
+                     new_c: int,
+                     prev_var_rc: int = None):
+
+        self._rounds += 1
+
+        if self.backpressure == BACKPRESSURE_SAMPLE and (self._rounds - 1) % self.sample_every != 0:
+            self.dropped += len(self._workers)
+            return
+
+        # the verifier keeps changing the random choices, the observers get the ones of this round
+        self._publish(
+            "on_new_round", (current_operator, s, prev_c, dict(new_rc), new_c, prev_var_rc),
+            self.backpressure == BACKPRESSURE_DROP
+        )
+
+    def on_terminated(self, accepted: bool):
+        self._publish("on_terminated", (accepted,), False)
+
+    # waits until the observers have processed all events published so far
+    def flush(self):
+        for worker in self._workers:
+            worker.queue.join()
+
+    # delivers the remaining events and stops the workers, raises the first exception of an observer
+    def close(self):
+
+        if self._closed:
+            return
+
+        self._closed = True
+
+        for worker in self._workers:
+            worker.queue.put(_STOP)
+
+        for worker in self._workers:
+            worker.thread.join()
+
+        for worker in self._workers:
+            if worker.error is not None:
+                raise worker.error
@@ -0,0 +1,91 @@
+from random import Random
+import logging
+import numpy as np
+from qbf import QBF
+from prover import Prover, ProofSchedule
+from interpolation import evaluate_many, evaluation_point_count, field_array
+
+logger = logging.getLogger("protocol")
+
+
+# runs the given amount of independent instances of the protocol in lockstep,
+# the proof is accepted only if every single instance accepts, so that the
+# soundness error of a single run is raised to the power of repetitions
+def run_parallel_verifier(qbf: QBF, /, prover: Prover, p: int, repetitions: int, *,
+                          seed: int = None, adaptive: bool = False) -> bool:
+    assert repetitions >= 1
+
+    schedule = ProofSchedule(qbf, adaptive)
+
+    logger.info("[V]: Running %d instances of the protocol in parallel", repetitions)
+
+    c = prover.get_value_of_entire_polynomial()
+
+    logger.info("[P]: Value = %d =: c", c)
+
+    if c == 0:
+        return False
+
+    rng = Random(seed)
+
+    c = field_array([c] * repetitions, p)
+
+    # every variable is mapped to the array of its random values in the instances
+    rc = {}
+
+    for current_operator in schedule:
+
+        variable = current_operator.get_primary_variable()
+
+        logger.info("-" * 30)
+        logger.info(
+            "Starting round %d. Current operator: %s",
+            schedule.get_round_number(current_operator),
+            current_operator.to_string(qbf)
+        )
+
+        point_count = evaluation_point_count(schedule.get_degree_bound(current_operator), p)
+
+        s = prover.get_operator_evaluation_matrix(current_operator, rc, point_count - 1, repetitions)
+
+        if s.ndim != 2 or s.shape[0] != repetitions or not 1 <= s.shape[1] <= point_count:
+            logger.info("[V]: The prover has sent a malformed message of shape %s, rejecting.", s.shape)
+            return False
+
+        s = field_array(s, p) % p
+
+        s_0 = s[:, 0]
+        s_1 = s[:, 1] if s.shape[1] >= 2 else s_0
+
+        if current_operator.is_linearity_operator():
+            lin_var_val = rc[variable]
+            check = (lin_var_val * s_1 + (1 - lin_var_val) * s_0) % p
+        elif qbf.get_quantification(variable) == QBF.Q_FORALL:
+            check = s_0 * s_1 % p
+        else:
+            assert qbf.get_quantification(variable) == QBF.Q_EXISTS
+            check = (s_0 + s_1) % p
+
+        failed = np.flatnonzero(check != c)
+
+        if len(failed) != 0:
+            logger.info("[V]: The check has failed in instances %s, rejecting.", ", ".join(str(i) for i in failed))
+            return False
+
+        logger.info("[V]: The check has succeeded in all instances")
+
+        # choose a vector of random values, one per instance
+        a = field_array([rng.randrange(p) for _ in range(repetitions)], p)
+        rc[variable] = a
+
+        c = evaluate_many(s, a, p)
+
+    matrix_values = qbf.evaluate_matrix(rc, p)
+
+    if np.any(matrix_values != c):
+        logger.info("[V]: P_phi does not match the last claim in some instance, rejecting.")
+        return False
+
+    logger.info("[V]: All %d instances accepted.", repetitions)
+
+    return True
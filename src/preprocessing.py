@@ -0,0 +1,206 @@
+import logging
+from qbf import QBF
+
+logger = logging.getLogger("prover")
+
+
+class PreprocessedQBF:
+
+    def __init__(self, original: QBF, qbf: QBF = None, variable_map: dict = None, value: bool = None):
+        self.original = original
+        # None if the formula has been decided by preprocessing
+        self.qbf = qbf
+        # maps every variable of the preprocessed formula to the variable of the original one
+        self.variable_map = variable_map if variable_map is not None else {}
+        # truth value of the formula, if it has been decided by preprocessing
+        self.value = value
+
+    def is_decided(self) -> bool:
+        return self.value is not None
+
+    def get_original_variable(self, variable: int) -> int:
+        return self.variable_map[variable]
+
+    def get_original_name(self, variable: int) -> str:
+        return self.original.get_name(self.variable_map[variable])
+
+
+class _Preprocessor:
+
+    def __init__(self, qbf: QBF):
+        self.qbf = qbf
+
+        # drop tautologies, no later step can create new ones
+        self.clauses = set(
+            frozenset(clause) for clause in qbf.get_clauses()
+            if not any(-literal in clause for literal in clause)
+        )
+
+        self.conflict = False
+
+    def _is_universal(self, literal: int) -> bool:
+        return self.qbf.get_quantification(abs(literal)) == QBF.Q_FORALL
+
+    # a universal literal can be removed from a clause if no existential
+    # literal of the clause is quantified after it
+    def _universal_reduction(self) -> bool:
+
+        changed = False
+
+        for clause in list(self.clauses):
+
+            innermost_existential = max((abs(literal) for literal in clause if not self._is_universal(literal)),
+                                        default=0)
+
+            reduced = frozenset(
+                literal for literal in clause
+                if not self._is_universal(literal) or abs(literal) < innermost_existential
+            )
+
+            if reduced != clause:
+                self.clauses.discard(clause)
+                self.clauses.add(reduced)
+                changed = True
+
+            if len(reduced) == 0:
+                self.conflict = True
+
+        return changed
+
+    def _assign(self, literal: int):
+
+        new_clauses = set()
+
+        for clause in self.clauses:
+
+            if literal in clause:
+                continue
+
+            if -literal in clause:
+                clause = clause - {-literal}
+
+                if len(clause) == 0:
+                    self.conflict = True
+
+            new_clauses.add(clause)
+
+        self.clauses = new_clauses
+
+    def _unit_propagation(self) -> bool:
+
+        changed = False
+
+        while not self.conflict:
+
+            unit = next((clause for clause in self.clauses if len(clause) == 1), None)
+
+            if unit is None:
+                break
+
+            literal = next(iter(unit))
+
+            if self._is_universal(literal):
+                # universal reduction turns this clause into the empty clause
+                self.conflict = True
+                break
+
+            self._assign(literal)
+            changed = True
+
+        return changed
+
+    def _pure_literal_elimination(self) -> bool:
+
+        literals = set(literal for clause in self.clauses for literal in clause)
+
+        changed = False
+
+        for literal in literals:
+
+            if -literal in literals:
+                continue
+
+            # existential pure literals are satisfied, universal ones are falsified
+            self._assign(-literal if self._is_universal(literal) else literal)
+            changed = True
+
+        return changed
+
+    def _subsumption(self) -> bool:
+
+        occurrences = {}
+
+        for clause in self.clauses:
+            for literal in clause:
+                occurrences.setdefault(literal, []).append(clause)
+
+        subsumed = set()
+
+        for clause in sorted(self.clauses, key=len):
+
+            if clause in subsumed or len(clause) == 0:
+                continue
+
+            # every clause subsumed by this one contains its rarest literal
+            rarest = min(clause, key=lambda literal: len(occurrences[literal]))
+
+            for candidate in occurrences[rarest]:
+                if candidate is not clause and candidate not in subsumed and clause <= candidate:
+                    subsumed.add(candidate)
+
+        self.clauses -= subsumed
+
+        return len(subsumed) != 0
+
+    def run(self):
+
+        changed = True
+
+        while changed and not self.conflict:
+            changed = self._universal_reduction()
+
+            if self.conflict:
+                break
+
+            changed = self._unit_propagation() or changed
+
+            if self.conflict:
+                break
+
+            changed = self._pure_literal_elimination() or changed
+            changed = self._subsumption() or changed
+
+
+# simplify the formula using tautology removal, universal reduction, unit propagation,
+# pure literal elimination and subsumption, the result is a formula with the same truth value
+def preprocess_qbf(qbf: QBF) -> PreprocessedQBF:
+
+    if not qbf.has_cnf_matrix():
+        raise ValueError("Preprocessing only applies to formulas whose matrix is in CNF")
+
+    preprocessor = _Preprocessor(qbf)
+    preprocessor.run()
+
+    if preprocessor.conflict:
+        logger.info("Preprocessing has shown that the formula is false")
+        return PreprocessedQBF(qbf, value=False)
+
+    if len(preprocessor.clauses) == 0:
+        logger.info("Preprocessing has shown that the formula is true")
+        return PreprocessedQBF(qbf, value=True)
+
+    # quantifiers of variables that no longer occur in the matrix can be dropped
+    variables = sorted(set(abs(literal) for clause in preprocessor.clauses for literal in clause))
+
+    clauses = sorted(
+        (sorted(clause, key=abs) for clause in preprocessor.clauses),
+        key=lambda clause: [abs(literal) for literal in clause]
+    )
+
+    reduced, variable_map = qbf.restrict(variables, clauses)
+
+    logger.info("Preprocessing reduced the formula from %d variables and %d clauses to %d variables and %d clauses",
+                qbf.get_variable_count(), qbf.get_clause_count(),
+                reduced.get_variable_count(), reduced.get_clause_count())
+
+    return PreprocessedQBF(qbf, reduced, variable_map)
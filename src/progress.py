@@ -0,0 +1,129 @@
+import logging
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, memory budgets are not enforced there
+    resource = None
+
+logger = logging.getLogger("prover")
+
+
+class PrecomputationCancelled(Exception):
+    pass
+
+
+class BudgetExceeded(PrecomputationCancelled):
+    pass
+
+
+class CancellationToken:
+
+    # can be cancelled from any thread, the precomputation notices it after the current operator
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class ProgressEvent:
+
+    # the operator with the given index (1, ..., total, in the order of the precomputation)
+    # has been applied, terms and degree describe the resulting polynomial
+    def __init__(self, operator, index: int, total: int, elapsed: float, terms: int, degree: int):
+        self.operator = operator
+        self.index = index
+        self.total = total
+        self.elapsed = elapsed
+        self.terms = terms
+        self.degree = degree
+
+
+def log_progress(event: ProgressEvent):
+    logger.info("Applied operator %d of %d after %.2f s, %d terms of total degree %d",
+                event.index, event.total, event.elapsed, event.terms, event.degree)
+
+
+# resident memory of the process in bytes, None if it can not be determined, where the current
+# resident memory is not available, the peak since the start of the process is returned instead
+def resident_memory():
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # bytes on macOS, kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PrecomputationMonitor:
+
+    # listener is called with a ProgressEvent after every operator, max_seconds limits the wall-clock
+    # time since start, max_memory the growth of the resident memory of the process since start
+    # in bytes, both are checked between operators, just like the cancellation token
+    def __init__(self, *, listener=None, max_seconds: float = None, max_memory: int = None,
+                 token: CancellationToken = None):
+        self.listener = listener
+        self.max_seconds = max_seconds
+        self.max_memory = max_memory
+        self.token = token
+
+        self._start = None
+        self._start_memory = None
+        self._total = 0
+        self._index = 0
+
+    def start(self, total: int):
+        self._start = time.monotonic()
+        self._start_memory = resident_memory()
+        self._total = total
+        self._index = 0
+
+        self.check()
+
+    def check(self):
+
+        if self.token is not None and self.token.is_cancelled():
+            raise PrecomputationCancelled("The precomputation has been cancelled")
+
+        elapsed = time.monotonic() - self._start
+
+        if self.max_seconds is not None and elapsed > self.max_seconds:
+            raise BudgetExceeded("The precomputation has exceeded its time budget of %.2f s" % self.max_seconds)
+
+        if self.max_memory is not None:
+
+            memory = resident_memory()
+
+            if memory is not None and self._start_memory is not None and memory - self._start_memory > self.max_memory:
+                raise BudgetExceeded("The precomputation has exceeded its memory budget of %d bytes" % self.max_memory)
+
+    # describe returns the term count and the total degree of the polynomial the operator resulted in,
+    # it is only called if there is a listener
+    def operator_applied(self, operator, describe):
+
+        self._index += 1
+
+        if self.listener is not None:
+            terms, degree = describe()
+
+            self.listener(ProgressEvent(
+                operator, self._index, self._total, time.monotonic() - self._start, terms, degree
+            ))
+
+        self.check()
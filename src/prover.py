@@ -1,7 +1,17 @@
 import logging
+import numpy as np
 import sympy
 from qbf import QBF
 from prime import next_prime
+from interpolation import field_array
+from compiled import CompiledPolynomial
+from crt import MultiModularEngine
+from solver import QBFSolver
+from response_cache import ResponseCache
+from matrix_cache import MatrixCache
+from progress import PrecomputationMonitor
+from multilinear import MultilinearPolynomial, QuadraticPolynomial, MAX_MULTILINEAR_VARIABLES, \
+    MAX_QUADRATIC_VARIABLES, MIN_MULTILINEAR_DENSITY, is_multilinear
 
 logger = logging.getLogger("prover")
 
@@ -30,6 +40,57 @@ def _exists_operator(poly, v):
     return _to_poly(poly.subs(v, 0) + poly.subs(v, 1), poly)
 
 
+def _evaluate_univariate(poly, x: int) -> int:
+    return int(poly.eval(x).as_poly(poly.gens).LC())
+
+
+def _evaluate_at(poly, values: dict) -> int:
+    # values may contain variables the polynomial does not depend on
+    value = poly.eval({symbol: a for symbol, a in values.items() if symbol in poly.gens})
+
+    if isinstance(value, sympy.Poly):
+        assert value.is_ground
+        return int(value.LC())
+
+    return int(value)
+
+
+def _evaluate_coefficients(coefficients: list, x: int, p: int) -> int:
+
+    result = 0
+
+    for c in reversed(coefficients):
+        result = (result * x + c) % p
+
+    return result
+
+
+# once a polynomial is multilinear, the following linearity and existential operators
+# can work on its bitmask-indexed coefficient array instead of the sympy polynomial,
+# as long as the array is not much larger than the polynomial
+def _to_multilinear_if_possible(poly):
+
+    if len(poly.gens) <= MAX_MULTILINEAR_VARIABLES and \
+            len(poly.terms()) >= MIN_MULTILINEAR_DENSITY * (1 << len(poly.gens)) and is_multilinear(poly):
+        return MultilinearPolynomial.from_poly(poly)
+
+    return poly
+
+
+# the polynomial compiled with the given primary variable first, followed by the other
+# variables it depends on, in ascending order, the result also contains the list of the latter
+def compile_for_variable(qbf: QBF, poly, primary: int, p: int) -> tuple:
+
+    others = sorted(
+        v for v in range(1, qbf.get_variable_count() + 1)
+        if v != primary and qbf.get_symbol(v) in poly.gens and poly.degree(qbf.get_symbol(v)) > 0
+    )
+
+    compiled = CompiledPolynomial(poly, [qbf.get_symbol(v) for v in [primary] + others], p)
+
+    return compiled, others
+
+
 class ProofOperator:
 
     def __init__(self, variable: int = 1, linearizing_variable: int = 0):
@@ -62,34 +123,12 @@ class ProofOperator:
 
         return self.v
 
-    def is_first_operator(self) -> bool:
-        return not self.is_linearity_operator() and self.v == 1
-
-    def is_last_operator(self, qbf: QBF) -> bool:
-        return self.v == qbf.get_variable_count() and self.lv == qbf.get_variable_count()
-
     def get_leftmost_not_yet_resolved_variable(self) -> int:
         return max(self.v, self.lv) + 1
 
     def next_quantifier_operator(self):
         return ProofOperator(self.v + 1)
 
-    def get_round_number(self) -> int:
-        return (self.v * (self.v - 1) // 2) + self.v + self.lv
-
-    def previous_operator(self):
-
-        if self.is_first_operator():
-            return None
-
-        if not self.is_linearity_operator():
-            return ProofOperator(self.v - 1, self.v - 1)
-
-        # we are dealing with a linearity operator
-        # the previous operator may be both a quantifier
-        # as well as a linearity operator
-        return ProofOperator(self.v, self.lv - 1)
-
     def to_string(self, context: QBF) -> str:
 
         if self.lv != 0:
@@ -104,6 +143,104 @@ class ProofOperator:
             return "E_{%s}" % context.get_name(self.v)
 
 
+class ProofSchedule:
+
+    # the sequence of proof operators, in the order in which the verifier processes them,
+    # together with the maximum degree of the s polynomial the prover may send for each of them
+    # an adaptive schedule leaves out the linearity operators on variables whose degree
+    # is already at most 1, such operators do not change the polynomial they are applied to
+    def __init__(self, qbf: QBF, adaptive: bool = False):
+        self.qbf = qbf
+        self.adaptive = adaptive
+
+        operators = []
+
+        for v in range(1, qbf.get_variable_count() + 1):
+
+            operators.append(ProofOperator(v))
+
+            for lin_var in range(1, v + 1):
+                operators.append(ProofOperator(v, lin_var))
+
+        self._degree_bounds = self._compute_degree_bounds(operators)
+
+        self._operators = [operator for operator in operators if operator in self._degree_bounds]
+
+        self._round_numbers = {operator: i + 1 for i, operator in enumerate(self._operators)}
+
+    def __iter__(self):
+        return iter(self._operators)
+
+    def __len__(self) -> int:
+        return len(self._operators)
+
+    def get_operators(self) -> list:
+        return self._operators
+
+    def get_degree_bound(self, operator: ProofOperator) -> int:
+        return self._degree_bounds[operator]
+
+    def get_round_number(self, operator: ProofOperator) -> int:
+        return self._round_numbers[operator]
+
+    # the operator processed right before the given one, None for the first operator
+    def previous_operator(self, operator: ProofOperator):
+
+        round_number = self._round_numbers[operator]
+
+        if round_number == 1:
+            return None
+
+        return self._operators[round_number - 2]
+
+    # the operator processed right after the given one, None for the last operator
+    def next_operator(self, operator: ProofOperator):
+
+        round_number = self._round_numbers[operator]
+
+        if round_number == len(self._operators):
+            return None
+
+        return self._operators[round_number]
+
+    def is_last_operator(self, operator: ProofOperator) -> bool:
+        return self._round_numbers[operator] == len(self._operators)
+
+    def _compute_degree_bounds(self, operators: list) -> dict:
+
+        # degree of the current polynomial in every variable, starting with P_phi
+        degree = {
+            v: self.qbf.get_variable_degree(v) for v in range(1, self.qbf.get_variable_count() + 1)
+        }
+
+        bounds = {}
+
+        # iterate over the proof operator sequence, in reverse order
+        for operator in reversed(operators):
+
+            variable = operator.get_primary_variable()
+
+            if self.adaptive and operator.is_linearity_operator() and degree[variable] <= 1:
+                continue
+
+            # s is the polynomial to which all further operators evaluate,
+            # restricted to the primary variable of the operator
+            bounds[operator] = degree[variable]
+
+            if operator.is_linearity_operator():
+                degree[variable] = min(degree[variable], 1)
+                continue
+
+            del degree[variable]
+
+            if self.qbf.get_quantification(variable) == QBF.Q_FORALL:
+                # s(0) * s(1) doubles the degree in every remaining variable
+                for v in degree:
+                    degree[v] *= 2
+
+        return bounds
+
+
 class Prover:
 
     def __init__(self, qbf: QBF, p: int):
@@ -123,47 +260,153 @@ class Prover:
 
         return s.trunc(self.p).exclude()
 
+    def _get_operator_evaluations(self, operator: ProofOperator, random_choices: dict, degree: int) -> list:
+        s = self.get_operator_polynomial(operator, random_choices)
+        return [_evaluate_univariate(s, x) for x in range(degree + 1)]
+
+    # the s polynomial in evaluation form, that is, its values at 0, 1, ..., degree
+    def get_operator_evaluations(self, operator: ProofOperator, random_choices: dict, degree: int) -> list:
+        return [
+            value % self.p for value in self._get_operator_evaluations(operator, random_choices, degree)
+        ]
+
+    def _get_operator_evaluation_matrix(self, operator: ProofOperator, random_choices: dict,
+                                        degree: int, repetitions: int):
+        return field_array([
+            self._get_operator_evaluations(
+                operator,
+                {variable: int(a[i]) for variable, a in random_choices.items()},
+                degree
+            ) for i in range(repetitions)
+        ], self.p)
+
+    # answer the same operator for several independent protocol instances at once,
+    # random_choices maps every variable to the array of its values in the instances,
+    # row i of the result holds the s polynomial of instance i in evaluation form
+    def get_operator_evaluation_matrix(self, operator: ProofOperator, random_choices: dict,
+                                       degree: int, repetitions: int):
+        return self._get_operator_evaluation_matrix(operator, random_choices, degree, repetitions) % self.p
+
+    # messages of the batched protocol (batched.py), all of them in evaluation form at 0, 1, ..., degree
+    # M_v denotes the multilinear extension of the values of the v-th quantified subformula
+
+    # M_v(point, x), where point holds the values of the variables 1, ..., v - 1
+    def get_extension_evaluations(self, v: int, point: list, degree: int) -> list:
+        raise NotImplementedError()
+
+    # sum-check round polynomial of sum_b eq(point, b) * M_v(b, 0) * M_v(b, 1) over b in {0, 1}^(v - 1),
+    # with the first variables of b fixed to the given values
+    def get_product_sum_evaluations(self, v: int, point: list, fixed: list, degree: int) -> list:
+        raise NotImplementedError()
+
+    # sum-check round polynomial of sum_b eq(point, b) * P_phi(b) over b in {0, 1}^n,
+    # with the first variables of b fixed to the given values
+    def get_matrix_sum_evaluations(self, point: list, fixed: list, degree: int) -> list:
+        raise NotImplementedError()
+
 
 class HonestProver(Prover):
 
-    def __init__(self, /, qbf: QBF):
+    # adaptive = True makes the prover follow the adaptive proof schedule
+    # modular = True selects the prime with the multi-modular engine before building the
+    # operator chain, whose polynomials are then reduced modulo p after every operator,
+    # instead of computing the exact value of the entire polynomial, the engine distributes
+    # its moduli across the given number of processes
+    # the responses are memoized in a cache of response_cache_size entries, shared by all
+    # protocol sessions using this prover
+    # with a matrix cache shared between provers, the matrix arithmetization of a CNF formula is
+    # obtained from the one of an earlier version of the formula that differs in a few clauses
+    # the monitor receives progress events and may abort the precomputation between operators
+    # with solve, CNF formulas are decided by the solver first, and for false ones the precomputation
+    # is skipped, the verifier rejects them as soon as the prover reports the value 0
+    def __init__(self, /, qbf: QBF, *, adaptive: bool = False, modular: bool = False, processes: int = 1,
+                 response_cache_size: int = 4096, matrix_cache: MatrixCache = None,
+                 monitor: PrecomputationMonitor = None, solve: bool = True):
         super().__init__(qbf, 0)
 
+        self.response_cache = ResponseCache(response_cache_size)
+        self.matrix_cache = matrix_cache
+
         self._polynomial_after_operator = {}
 
-        cur_p = qbf.arithmetize_matrix()
+        # straight-line evaluators of the stored polynomials, compiled on first use
+        self._compiled = {}
+
+        # terms of the polynomial each block of linearity operators starts with, and the
+        # restrictions of that polynomial computed for the current protocol session
+        self._block_terms = {}
+        self._session = None
+
+        self.schedule = ProofSchedule(qbf, adaptive)
+
+        # the budgets of the monitor also cover the solver and the multi-modular engine
+        if monitor is not None:
+            monitor.start(len(self.schedule))
+
+        self.decided_false = solve and qbf.has_cnf_matrix() and not QBFSolver(qbf, monitor).solve()
+
+        if self.decided_false:
+            logger.info("Skipping the precomputation of the operator polynomials of the false formula")
+            self._select_prime(0)
+            return
+
+        if modular:
+            self.p, residue = MultiModularEngine(qbf, processes=processes).protocol_prime()
+
+        cur_p = self._arithmetize()
 
         # iterate over the proof operator sequence, in reverse order
-        for v in range(qbf.get_variable_count(), 0, -1):
+        for current_operator in reversed(self.schedule.get_operators()):
 
-            for variable_to_linearize in range(v, 0, -1):
-                current_operator = ProofOperator(v, variable_to_linearize)
+            self._store_polynomial(current_operator, cur_p)
 
-                assert current_operator not in self._polynomial_after_operator
-                self._polynomial_after_operator[current_operator] = cur_p
+            cur_p = self._apply_operator(cur_p, current_operator)
+            # cur_p is now a polynomial with the operator applied
 
-                cur_p = _linearity_operator(cur_p, self.qbf.get_symbol(variable_to_linearize))
-                # cur_p is now a polynomial where variable_to_linearize is linearized
+            if modular:
+                cur_p = self._reduce_intermediate_polynomial(cur_p)
 
-            current_operator = ProofOperator(v)
-            assert current_operator not in self._polynomial_after_operator
-            self._polynomial_after_operator[current_operator] = cur_p
+            if monitor is not None:
+                monitor.operator_applied(current_operator, lambda: self._describe_polynomial(cur_p))
 
-            quantification = qbf.get_quantification(v)
+        if modular:
+            self.entire_polynomial_value = self._polynomial_value(cur_p) % self.p
+            assert self.entire_polynomial_value == residue, "Operator chain disagrees with the residue"
+        else:
+            self._select_prime(self._polynomial_value(cur_p))
 
-            if quantification == QBF.Q_FORALL:
-                cur_p = _forall_operator(cur_p, self.qbf.get_symbol(v))
-            elif quantification == QBF.Q_EXISTS:
-                cur_p = _exists_operator(cur_p, self.qbf.get_symbol(v))
-            else:
-                assert False
+        # prime p is not computed
+        # it is a good idea to reduce all coefficients appearing in the polynomials
+        # modulo p, to simplify further computations
+        for op, poly in self._polynomial_after_operator.items():
+            self._polynomial_after_operator[op] = self._reduce_polynomial(poly)
+
+    # the compiled evaluators can not be pickled, they are compiled again when needed
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_compiled"] = {}
+        return state
+
+    def _arithmetize(self):
+
+        if self.matrix_cache is not None and self.qbf.has_cnf_matrix():
+            return self.matrix_cache.arithmetize(self.qbf)
+
+        return self.qbf.arithmetize_matrix()
+
+    def _store_polynomial(self, operator: ProofOperator, poly):
+        assert operator not in self._polynomial_after_operator
+        self._polynomial_after_operator[operator] = poly
 
-            # cur_p is now a polynomial with the quantification applied
+    # the polynomial to which the operator is applied, reduced modulo p
+    def _get_stored_polynomial(self, operator: ProofOperator):
+        return self._polynomial_after_operator[operator]
 
-        self.p = qbf.get_lower_bound_for_protocol_prime()
+    def _select_prime(self, value: int):
 
-        assert cur_p.is_ground, "Polynomial at the end of the protocol is not trivial"
-        self.entire_polynomial_value = int(cur_p.LC())
+        self.p = self.qbf.get_lower_bound_for_protocol_prime()
+
+        self.entire_polynomial_value = value
 
         if self.entire_polynomial_value != 0:
             # qbf sentence is true
@@ -172,11 +415,91 @@ class HonestProver(Prover):
 
             self.entire_polynomial_value %= self.p
 
-        # prime p is not computed
-        # it is a good idea to reduce all coefficients appearing in the polynomials
-        # modulo p, to simplify further computations
-        for op, poly in self._polynomial_after_operator.items():
-            self._polynomial_after_operator[op] = poly.trunc(self.p)
+    def _apply_operator(self, poly, operator: ProofOperator):
+
+        if isinstance(poly, MultilinearPolynomial):
+
+            if operator.is_linearity_operator():
+                # the linearity operator does not change multilinear polynomials
+                return poly
+
+            if self.qbf.get_quantification(operator.v) == QBF.Q_EXISTS:
+                return poly.exists(self.qbf.get_symbol(operator.v))
+
+            # the product of the two halves is no longer multilinear, but quadratic in every variable,
+            # the linearity operators that follow turn it into a multilinear polynomial again
+            if len(poly.symbols) <= MAX_QUADRATIC_VARIABLES:
+                return poly.forall(self.qbf.get_symbol(operator.v))
+
+            poly = poly.to_poly()
+
+        if isinstance(poly, QuadraticPolynomial):
+
+            if operator.is_linearity_operator():
+                return poly.linearize(self.qbf.get_symbol(operator.lv))
+
+            poly = poly.to_poly()
+
+        if operator.is_linearity_operator():
+
+            symbol = self.qbf.get_symbol(operator.lv)
+
+            # sparse polynomials stay in sympy even once they are multilinear
+            if symbol not in poly.gens or poly.degree(symbol) <= 1:
+                return poly
+
+            return _to_multilinear_if_possible(_linearity_operator(poly, symbol))
+
+        quantification = self.qbf.get_quantification(operator.v)
+
+        if quantification == QBF.Q_FORALL:
+            return _forall_operator(poly, self.qbf.get_symbol(operator.v))
+        elif quantification == QBF.Q_EXISTS:
+            return _exists_operator(poly, self.qbf.get_symbol(operator.v))
+        else:
+            assert False
+
+    # value of the polynomial obtained after applying all operators
+    def _polynomial_value(self, poly) -> int:
+
+        if isinstance(poly, (MultilinearPolynomial, QuadraticPolynomial)):
+            return poly.constant()
+
+        assert poly.is_ground, "Polynomial at the end of the protocol is not trivial"
+        return int(poly.LC())
+
+    # number of terms and total degree of a polynomial of the operator chain
+    def _describe_polynomial(self, poly) -> tuple:
+
+        if isinstance(poly, MultilinearPolynomial):
+            masks = np.flatnonzero(poly.coefficients != 0)
+            return len(masks), max((bin(mask).count("1") for mask in masks), default=0)
+
+        if isinstance(poly, QuadraticPolynomial):
+            # the exponents are the indices along the axes
+            exponents = np.nonzero(poly.coefficients != 0)
+            return len(exponents[0]), int(max(sum(exponents), default=0))
+
+        return len(poly.terms()), poly.total_degree()
+
+    # reduction modulo p while the operator chain is built, keeping the representation
+    def _reduce_intermediate_polynomial(self, poly):
+
+        if isinstance(poly, MultilinearPolynomial):
+            return MultilinearPolynomial(poly.symbols, poly.coefficients % self.p, poly.p)
+
+        if isinstance(poly, QuadraticPolynomial):
+            return QuadraticPolynomial(poly.symbols, poly.coefficients % self.p, poly.p)
+
+        return poly.trunc(self.p)
+
+    def _reduce_polynomial(self, poly):
+
+        if isinstance(poly, (MultilinearPolynomial, QuadraticPolynomial)):
+            # the sympy form is cached, entries sharing a polynomial are converted once
+            poly = poly.to_poly()
+
+        return poly.trunc(self.p)
 
     def get_value_of_entire_polynomial(self) -> int:
         return self.entire_polynomial_value
@@ -185,81 +508,215 @@ class HonestProver(Prover):
 
         logger.info("Value of entire polynomial = %d", self.entire_polynomial_value)
 
+        if self.decided_false:
+            logger.info("The formula is false, its operator polynomials have not been computed")
+            return
+
         logger.info("Printing the operator followed by the "
                     "polynomial to which all further operators evaluate")
 
         # iterate over the proof operator sequence
-        for v in range(1, self.qbf.get_variable_count() + 1):
+        for current_operator in self.schedule:
 
-            current_operator = ProofOperator(v)
-
-            assert current_operator in self._polynomial_after_operator
-            cur_p = self._polynomial_after_operator[current_operator]
+            cur_p = self._get_stored_polynomial(current_operator)
 
             logger.info("%s: (degree %2s): %s",
                         current_operator.to_string(self.qbf),
                         cur_p.total_degree(),
                         _poly_to_str(cur_p))
 
-            for lin_var in range(1, v + 1):
+    def _get_compiled(self, operator: ProofOperator) -> tuple:
+
+        if operator not in self._compiled:
+            self._compiled[operator] = compile_for_variable(
+                self.qbf,
+                self._get_stored_polynomial(operator),
+                operator.get_primary_variable(),
+                self.p
+            )
+
+        return self._compiled[operator]
+
+    # coefficients of s in the primary variable of the operator, lowest degree first,
+    # s only depends on the challenges of the variables the stored polynomial depends on
+    def _get_s_coefficients(self, operator: ProofOperator, random_choices: dict) -> list:
+
+        if operator.is_linearity_operator():
+            others = [u for u in range(1, operator.v + 1) if u != operator.lv]
+        else:
+            compiled, others = self._get_compiled(operator)
+
+        challenges = tuple(random_choices[variable] % self.p for variable in others)
+
+        coefficients = self.response_cache.get(operator, challenges)
+
+        if coefficients is None:
+
+            if operator.is_linearity_operator():
+                coefficients = self._get_linearity_coefficients(operator, random_choices)
+            else:
+                coefficients = compiled.coefficients(list(challenges))
+
+            self.response_cache.put(operator, challenges, coefficients)
+
+        return coefficients
+
+    # the stored polynomial of the last linearity operator of block v, as the matrix of
+    # the exponents of the variables 1, ..., v in its terms, and the array of their coefficients
+    def _compute_block_terms(self, v: int) -> tuple:
+
+        operator = [op for op in self.schedule if op.v == v and op.is_linearity_operator()][-1]
+
+        poly = self._get_stored_polynomial(operator)
+
+        variables = {self.qbf.get_symbol(u): u for u in range(1, self.qbf.get_variable_count() + 1)}
+
+        exponents = np.zeros((len(poly.terms()), v), dtype=np.int64)
+        coefficients = []
+
+        for i, (monom, coefficient) in enumerate(poly.terms()):
+
+            for symbol, e in zip(poly.gens, monom):
+                if e != 0:
+                    exponents[i, variables[symbol] - 1] = e
+
+            coefficients.append(int(coefficient) % self.p)
+
+        # in lexicographic order, terms agreeing in the first variables are consecutive
+        order = np.lexsort(exponents.T[::-1])
+
+        return exponents[order], field_array(coefficients, self.p)[order]
+
+    def _get_block_terms(self, v: int) -> tuple:
+
+        if v not in self._block_terms:
+            self._block_terms[v] = self._compute_block_terms(v)
+
+        return self._block_terms[v]
+
+    # the stored polynomials of the linearity operators of block v, with every variable
+    # after the primary one replaced by its current challenge, such a variable is only
+    # chosen again after the operator, the polynomial of L_j is L_{j + 1} applied to the one
+    # of L_{j + 1}, so its restriction is the one of L_{j + 1} linearized at the challenge of j + 1
+    def _restrict_block(self, v: int, random_choices: dict) -> dict:
+
+        exponents, coefficients = self._get_block_terms(v)
+
+        linearized = {op.lv for op in self.schedule if op.v == v and op.is_linearity_operator()}
+
+        restrictions = {}
+
+        for u in range(v, 1, -1):
+
+            if u in linearized:
+                restrictions[u] = (exponents, coefficients)
+
+            # terms containing the variable are multiplied by the challenge, those without it are kept,
+            # a variable of degree at most 1 is linearized by substituting the challenge
+            coefficients = coefficients * np.where(exponents[:, -1] > 0, random_choices[u] % self.p, 1) % self.p
+
+            # merge the consecutive terms that only differed in the exponent of the variable
+            prefixes = exponents[:, :-1]
+            starts = np.flatnonzero(np.concatenate(([True], np.any(prefixes[1:] != prefixes[:-1], axis=1))))
 
-                current_operator = ProofOperator(v, lin_var)
+            exponents = prefixes[starts]
+            coefficients = np.add.reduceat(coefficients, starts) % self.p
 
-                assert current_operator in self._polynomial_after_operator
-                cur_p = self._polynomial_after_operator[current_operator]
+        if 1 in linearized:
+            restrictions[1] = (exponents, coefficients)
 
-                logger.info("%s: (degree %2s): %s",
-                            current_operator.to_string(self.qbf),
-                            cur_p.total_degree(),
-                            _poly_to_str(cur_p))
+        return restrictions
+
+    # coefficients of s for a linearity operator from the restrictions of the current session,
+    # consecutive rounds of a session only substitute the challenges chosen during the block,
+    # the restrictions are recomputed whenever the challenges they depend on have changed
+    def _get_linearity_coefficients(self, operator: ProofOperator, random_choices: dict) -> list:
+
+        v, j = operator.v, operator.lv
+
+        fixed = {u: random_choices[u] % self.p for u in range(j + 1, v + 1)}
+
+        if self._session is None or self._session[0] != v or \
+                any(self._session[1][u] != a for u, a in fixed.items()):
+            fixed = {u: random_choices[u] % self.p for u in range(2, v + 1)}
+            self._session = (v, fixed, self._restrict_block(v, random_choices))
+
+        exponents, terms = self._session[2][j]
+
+        for u in range(1, j):
+
+            a = random_choices[u] % self.p
+
+            powers = field_array([pow(a, e, self.p) for e in range(int(exponents[:, u - 1].max()) + 1)], self.p)
+
+            terms = terms * powers[exponents[:, u - 1]] % self.p
+
+        coefficients = field_array([0] * (int(exponents[:, j - 1].max()) + 1), self.p)
+        np.add.at(coefficients, exponents[:, j - 1], terms)
+
+        return [int(c) % self.p for c in coefficients]
 
     def _get_operator_polynomial(self, operator: ProofOperator, random_choices: dict):
 
-        eval_subs = {}
+        coefficients = self._get_s_coefficients(operator, random_choices)
 
-        for variable, a in random_choices.items():
+        return sympy.Poly(
+            list(reversed(coefficients)),
+            self.qbf.get_symbol(operator.get_primary_variable()),
+            domain=sympy.ZZ
+        ).trunc(self.p)
 
-            if operator.is_linearity_operator_on(variable):
-                continue
+    def _get_operator_evaluations(self, operator: ProofOperator, random_choices: dict, degree: int) -> list:
 
-            eval_subs[self.qbf.get_symbol(variable)] = a
+        coefficients = self._get_s_coefficients(operator, random_choices)
 
-        poly = self._polynomial_after_operator[operator]
+        # evaluate s at every point instead of expanding it into a sympy polynomial
+        return [_evaluate_coefficients(coefficients, x, self.p) for x in range(degree + 1)]
 
-        return poly\
-            .eval(eval_subs)\
-            .as_poly(poly.gens)\
-            .trunc(self.p)\
-            .exclude()
+    def _get_operator_evaluation_matrix(self, operator: ProofOperator, random_choices: dict,
+                                        degree: int, repetitions: int):
 
-    def eval_polynomial_after_operator(self, var_values: dict, operator: ProofOperator) -> int:
+        compiled, others = self._get_compiled(operator)
+
+        zeros = field_array([0] * repetitions, self.p)
+
+        # the compiled program works on whole arrays, one entry per instance
+        s_coefficients = compiled.coefficients([random_choices[variable] % self.p for variable in others])
 
-        poly = self._polynomial_after_operator[operator]
+        columns = []
 
-        gens = (v.symbol for v in self.qbf.get_variables())
+        for x in range(degree + 1):
 
-        for variable, a in var_values.items():
+            column = zeros
 
-            eval_subs = {self.qbf.get_symbol(variable): a}
+            for e, s_coefficient in enumerate(s_coefficients):
+                column = (column + s_coefficient * pow(x, e, self.p)) % self.p
 
-            poly = _to_poly_simple(poly.eval(eval_subs), gens)
+            columns.append(column)
+
+        return np.stack(columns, axis=1)
+
+    def eval_polynomial_after_operator(self, var_values: dict, operator: ProofOperator) -> int:
 
-        return int(poly.LC()) % self.p
+        compiled, others = self._get_compiled(operator)
+
+        primary = operator.get_primary_variable()
+
+        return compiled.evaluate(
+            var_values[primary] if compiled.degree > 0 else 0,
+            [var_values[variable] for variable in others]
+        )
 
     def eval_polynomial_at_operator(self, var_values: dict, operator: ProofOperator = None) -> int:
         # operator = None means evaluate matrix arithmetization
 
         if operator is None:
-            return self.eval_polynomial_after_operator(var_values, ProofOperator(
-                self.qbf.get_variable_count(),
-                self.qbf.get_variable_count()
-            ))
+            # the last operator is applied to the matrix arithmetization itself
+            return self.eval_polynomial_after_operator(var_values, self.schedule.get_operators()[-1])
 
-        if operator.is_first_operator():
-            return self.get_value_of_entire_polynomial()
+        op = self.schedule.previous_operator(operator)
 
-        op = operator.previous_operator()
-
-        assert op is not None
+        if op is None:
+            return self.get_value_of_entire_polynomial()
 
         return self.eval_polynomial_after_operator(var_values, op)
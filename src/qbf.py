@@ -58,6 +58,13 @@ class QBF:
 
         self._matrix.append(clause)
 
+    def remove_clause(self, clause: set, /):
+
+        if set(clause) not in self._matrix:
+            raise ValueError("Clause %s is not part of the matrix" % sorted(clause, key=abs))
+
+        self._matrix.remove(set(clause))
+
     def add_variable(self, variable: int, /, quantification: bool, name: str = None):
         assert variable >= 1
 
@@ -111,23 +118,43 @@ class QBF:
             ]) + ")" for clause in self._matrix
         ], r" \wedge ")
 
+    def _arithmetize_clause(self, clause):
+
+        prod = 1
+
+        for literal in sorted(clause, key=abs):
+            if literal >= 1:
+                prod *= (1 - self._literal_to_variable(literal).symbol)
+            else:
+                prod *= self._literal_to_variable(literal).symbol
+
+        return 1 - prod
+
+    # the factor of P_phi of the given clause, as a polynomial in all variables
+    def arithmetize_clause(self, clause):
+        return sympy.Poly(self._arithmetize_clause(clause), *(v.symbol for v in self._var), domain=sympy.ZZ)
+
     def arithmetize_matrix(self):
 
         p_phi = 1
 
         for clause in self._matrix:
-            prod = 1
-
-            for literal in sorted(clause, key=abs):
-                if literal >= 1:
-                    prod *= (1 - self._literal_to_variable(literal).symbol)
-                else:
-                    prod *= self._literal_to_variable(literal).symbol
-
-            p_phi *= 1 - prod
+            p_phi *= self._arithmetize_clause(clause)
 
         return sympy.Poly(p_phi, *(v.symbol for v in self._var), domain=sympy.ZZ)
 
+    # the factors of P_phi, one per clause, each being a polynomial
+    # only in the variables occurring in the clause
+    def arithmetize_clauses(self) -> list:
+        return [
+            sympy.Poly(
+                self._arithmetize_clause(clause),
+                *(self._var[v - 1].symbol for v in sorted(set(_literal_to_variable(literal) for literal in clause))),
+                domain=sympy.ZZ
+            ) if len(clause) != 0 else sympy.Poly(0, *(v.symbol for v in self._var[:1]), domain=sympy.ZZ)
+            for clause in self._matrix
+        ]
+
     def _latex_clause_arithmetization(self, clause) -> str:
 
         return "1 - " + " ".join([
@@ -151,6 +178,106 @@ class QBF:
     def get_clause_count(self) -> int:
         return len(self._matrix)
 
+    # whether the clause-based algorithms, such as the solver, apply to the formula
+    def has_cnf_matrix(self) -> bool:
+        return True
+
+    def get_clauses(self):
+        return (clause for clause in self._matrix)
+
+    # degree of the matrix arithmetization P_phi in the given variable,
+    # every occurrence of the variable in a clause contributes one factor
+    def get_variable_degree(self, variable: int) -> int:
+        assert variable >= 1
+        return sum(
+            sum(1 for literal in clause if _literal_to_variable(literal) == variable)
+            for clause in self._matrix
+        )
+
+    # maximal runs of consecutive variables with the same quantification, outermost first
+    def get_quantifier_blocks(self) -> list:
+
+        blocks = []
+
+        for v in range(1, self.get_variable_count() + 1):
+
+            if len(blocks) != 0 and self.get_quantification(blocks[-1][-1]) == self.get_quantification(v):
+                blocks[-1].append(v)
+            else:
+                blocks.append([v])
+
+        return blocks
+
+    # evaluate the matrix arithmetization P_phi at the given point modulo p,
+    # without constructing the polynomial
+    def evaluate_matrix(self, values: dict, p: int) -> int:
+
+        result = 1
+
+        for clause in self._matrix:
+            prod = 1
+
+            for literal in clause:
+                a = values[_literal_to_variable(literal)]
+                prod = prod * ((1 - a) if literal >= 1 else a) % p
+
+            result = result * (1 - prod) % p
+
+        return result
+
+    # the formula over the given variables, in the given order, and the given clauses
+    # the variables are renumbered consecutively, the returned dictionary maps every
+    # variable of the new formula to the corresponding variable of this formula
+    def restrict(self, variables: list, clauses) -> tuple:
+
+        qbf = QBF()
+        variable_map = {}
+        renumbering = {}
+
+        for new_variable, variable in enumerate(variables, start=1):
+            var = self._var[variable - 1]
+            qbf.add_variable(new_variable, var.quantification, var.name)
+            variable_map[new_variable] = variable
+            renumbering[variable] = new_variable
+
+        for clause in clauses:
+            qbf.add_clause({
+                renumbering[_literal_to_variable(literal)] * (1 if literal >= 1 else -1) for literal in clause
+            })
+
+        return qbf, variable_map
+
+    def to_dict(self) -> dict:
+        return {
+            "variables": [
+                {"name": v.name, "quantification": "forall" if v.quantification == QBF.Q_FORALL else "exists"}
+                for v in self._var
+            ],
+            "clauses": [sorted(clause, key=abs) for clause in self._matrix]
+        }
+
+    @staticmethod
+    def from_dict(data: dict):
+
+        qbf = QBF()
+
+        for i, v in enumerate(data["variables"]):
+
+            if v["quantification"] not in ("forall", "exists"):
+                raise ValueError("Unknown quantification '%s'" % v["quantification"])
+
+            quantification = QBF.Q_FORALL if v["quantification"] == "forall" else QBF.Q_EXISTS
+            qbf.add_variable(i + 1, quantification, v["name"])
+
+        for clause in data["clauses"]:
+
+            if any(not isinstance(literal, int) or literal == 0 for literal in clause):
+                raise ValueError("Malformed clause %s" % clause)
+
+            qbf.add_clause(set(clause))
+
+        return qbf
+
     def get_arithmetization_latex_array(self):
 
         return [
@@ -0,0 +1,62 @@
+import logging
+from qbf import QBF
+
+logger = logging.getLogger("prover")
+
+
+def _interaction_graph(qbf: QBF) -> dict:
+
+    neighbours = {v: set() for v in range(1, qbf.get_variable_count() + 1)}
+
+    for clause in qbf.get_clauses():
+
+        variables = set(abs(literal) for literal in clause)
+
+        for v in variables:
+            neighbours[v] |= variables - {v}
+
+    return neighbours
+
+
+# permutes the variables inside every quantifier block, which does not change the value of the formula,
+# the operators are applied from the innermost variable outwards, so the order is built from the back:
+# the variable placed last in a block is the one with the fewest neighbours in the interaction graph,
+# as applying a quantifier to it merges the fewest factors, then it is eliminated from the graph
+# and its neighbours are connected to each other, like in a minimum degree elimination ordering
+# the result is the reordered formula and the map from its variables to the variables of qbf
+def reorder_qbf(qbf: QBF) -> tuple:
+
+    if not qbf.has_cnf_matrix():
+        raise ValueError("Reordering only applies to formulas whose matrix is in CNF")
+
+    neighbours = _interaction_graph(qbf)
+
+    order = []
+
+    for block in reversed(qbf.get_quantifier_blocks()):
+
+        remaining = set(block)
+        block_order = []
+
+        while len(remaining) != 0:
+
+            # ties are broken by the degree in P_phi and then by keeping the original order
+            v = min(remaining, key=lambda u: (len(neighbours[u]), qbf.get_variable_degree(u), -u))
+
+            for u in neighbours[v]:
+                neighbours[u] |= neighbours[v] - {u}
+                neighbours[u].discard(v)
+
+            del neighbours[v]
+
+            remaining.remove(v)
+            block_order.append(v)
+
+        order = list(reversed(block_order)) + order
+
+    reordered, variable_map = qbf.restrict(order, qbf.get_clauses())
+
+    logger.info("Reordered the variables within their quantifier blocks: %s",
+                ", ".join(qbf.get_name(v) for v in order))
+
+    return reordered, variable_map
@@ -0,0 +1,41 @@
+from collections import OrderedDict
+
+
+# memo of prover responses keyed by an operator and the challenges the response depends on,
+# at most max_entries responses are kept, the least recently used ones are evicted
+class ResponseCache:
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        self._responses = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def get(self, operator, challenges: tuple):
+
+        key = (operator, challenges)
+
+        if key not in self._responses:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._responses.move_to_end(key)
+
+        return self._responses[key]
+
+    def put(self, operator, challenges: tuple, response):
+
+        if self.max_entries <= 0:
+            return
+
+        self._responses[(operator, challenges)] = response
+        self._responses.move_to_end((operator, challenges))
+
+        while len(self._responses) > self.max_entries:
+            self._responses.popitem(last=False)
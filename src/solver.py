@@ -0,0 +1,230 @@
+import logging
+from qbf import QBF
+from progress import PrecomputationMonitor
+
+logger = logging.getLogger("prover")
+
+# number of decisions between two checks of the monitor
+MONITOR_CHECK_INTERVAL = 256
+
+
+# search-based QBF solver (QDPLL): variables are decided in the order of the quantifier prefix,
+# clauses with a single literal that is not false force it, or falsify the formula if it is universal,
+# which is found with two watched literals per clause, and a branch is closed as soon as all clauses
+# are satisfied or one of them is falsified, the formula is true if the existential player wins
+# the monitor, if any, is checked every MONITOR_CHECK_INTERVAL decisions, so that its budgets and
+# its cancellation token cover the search, which may take time exponential in the number of variables
+class QBFSolver:
+
+    def __init__(self, qbf: QBF, monitor: PrecomputationMonitor = None):
+
+        if not qbf.has_cnf_matrix():
+            raise ValueError("The solver only applies to formulas whose matrix is in CNF")
+
+        self.qbf = qbf
+        self.monitor = monitor
+
+        self.decisions = 0
+        self.propagations = 0
+
+        n = qbf.get_variable_count()
+
+        self._forall = [None] + [qbf.get_quantification(v) == QBF.Q_FORALL for v in range(1, n + 1)]
+
+        # tautologies are satisfied by every assignment
+        self._clauses = [
+            sorted(clause, key=abs) for clause in qbf.get_clauses()
+            if not any(-literal in clause for literal in clause)
+        ]
+
+        self._occurrences = {literal: [] for v in range(1, n + 1) for literal in (v, -v)}
+
+        for c, clause in enumerate(self._clauses):
+            for literal in clause:
+                self._occurrences[literal].append(c)
+
+        # the polarity tried first makes more clauses true for existential variables
+        # and more clauses false for universal ones
+        self._first_value = [None] + [
+            (len(self._occurrences[v]) >= len(self._occurrences[-v])) != self._forall[v] for v in range(1, n + 1)
+        ]
+
+        # the positions of the two watched literals of every clause with at least two literals,
+        # and the clauses watching every literal
+        self._watches = [[0, 1] for _ in self._clauses]
+        self._watchers = {literal: [] for literal in self._occurrences}
+
+        for c, clause in enumerate(self._clauses):
+            if len(clause) >= 2:
+                self._watchers[clause[0]].append(c)
+                self._watchers[clause[1]].append(c)
+
+        self._value = [None] * (n + 1)
+        self._trail = []
+        self._head = 0
+
+        # number of true literals of every clause, and the number of satisfied clauses
+        self._true_literals = [0] * len(self._clauses)
+        self._satisfied = 0
+
+        self._result = None
+
+    def _is_true(self, literal: int) -> bool:
+        return self._value[abs(literal)] == (literal > 0)
+
+    def _is_false(self, literal: int) -> bool:
+        return self._value[abs(literal)] == (literal < 0)
+
+    def _assign(self, literal: int):
+
+        self._value[abs(literal)] = literal > 0
+        self._trail.append(literal)
+
+        for c in self._occurrences[literal]:
+
+            self._true_literals[c] += 1
+
+            if self._true_literals[c] == 1:
+                self._satisfied += 1
+
+    # undoes all assignments after the first length ones
+    def _backtrack(self, length: int):
+
+        while len(self._trail) > length:
+
+            literal = self._trail.pop()
+
+            for c in self._occurrences[literal]:
+
+                self._true_literals[c] -= 1
+
+                if self._true_literals[c] == 0:
+                    self._satisfied -= 1
+
+            self._value[abs(literal)] = None
+
+        self._head = min(self._head, length)
+
+    # processes the assignments not yet propagated, returns False if a clause has been falsified
+    def _propagate(self) -> bool:
+
+        while self._head < len(self._trail):
+
+            false_literal = -self._trail[self._head]
+            self._head += 1
+
+            watchers = self._watchers[false_literal]
+
+            i = 0
+
+            while i < len(watchers):
+
+                c = watchers[i]
+                clause = self._clauses[c]
+                watch = self._watches[c]
+
+                if clause[watch[0]] != false_literal:
+                    watch[0], watch[1] = watch[1], watch[0]
+
+                other = clause[watch[1]]
+
+                if self._is_true(other):
+                    i += 1
+                    continue
+
+                # a replacement for the false watched literal is any other literal not being false
+                replacement = next(
+                    (k for k, literal in enumerate(clause) if k not in watch and not self._is_false(literal)), None
+                )
+
+                if replacement is not None:
+                    watch[0] = replacement
+                    watchers[i] = watchers[-1]
+                    watchers.pop()
+                    self._watchers[clause[replacement]].append(c)
+                    continue
+
+                # all literals except the other watched one are false
+                if self._is_false(other) or self._forall[abs(other)]:
+                    return False
+
+                self._assign(other)
+                self.propagations += 1
+
+                i += 1
+
+        return True
+
+    def _next_variable(self) -> int:
+        return next(v for v in range(1, len(self._value)) if self._value[v] is None)
+
+    def solve(self) -> bool:
+
+        if self._result is None:
+            self._result = self._search()
+
+            logger.info("The solver has shown that the formula is %s after %d decisions and %d propagations",
+                        "true" if self._result else "false", self.decisions, self.propagations)
+
+        return self._result
+
+    def _search(self) -> bool:
+
+        # clauses with at most one literal are decided before the search
+        for clause in self._clauses:
+
+            if len(clause) == 0 or (len(clause) == 1 and self._forall[abs(clause[0])]):
+                return False
+
+            if len(clause) == 1 and not self._is_true(clause[0]):
+
+                if self._is_false(clause[0]):
+                    return False
+
+                self._assign(clause[0])
+
+        # every decision is given by the number of assignments before it, its variable
+        # and whether the other value is being tried already
+        decisions = []
+
+        while True:
+
+            consistent = self._propagate()
+
+            if consistent and self._satisfied < len(self._clauses):
+
+                v = self._next_variable()
+
+                decisions.append((len(self._trail), v, False))
+                self._assign(v if self._first_value[v] else -v)
+                self.decisions += 1
+
+                if self.monitor is not None and self.decisions % MONITOR_CHECK_INTERVAL == 0:
+                    self.monitor.check()
+
+                continue
+
+            # the value of the current branch, now combined with the values of the branches of
+            # the decisions, the other value has to be tried only if the first one does not decide
+            # the quantifier, that is, for existential variables on false and universal ones on true
+            result = consistent
+
+            while True:
+
+                if len(decisions) == 0:
+                    return result
+
+                length, v, flipped = decisions.pop()
+
+                first_value = self._value[v]
+
+                self._backtrack(length)
+
+                if not flipped and result == self._forall[v]:
+                    decisions.append((length, v, True))
+                    self._assign(-v if first_value else v)
+                    break
+
+
+def solve_qbf(qbf: QBF) -> bool:
+    return QBFSolver(qbf).solve()
@@ -0,0 +1,227 @@
+import logging
+import numpy as np
+from qbf import QBF
+from prime import next_prime
+from prover import Prover, ProofOperator, ProofSchedule
+from interpolation import EvaluationForm, evaluation_point_count, field_array
+
+logger = logging.getLogger("prover")
+
+
+# the cube index of a point has bit i - 1 set if and only if variable i is 1
+def _cube_bits(variable_count: int, bit: int):
+    return (np.arange(1 << variable_count) >> bit) & 1
+
+
+# fix the variable corresponding to the lowest bit of the table to a
+def _fold_lowest(table, a: int, p: int):
+    low = table[0::2]
+    return (low + (table[1::2] - low) % p * a) % p
+
+
+# eq(h, b) = prod_i (h_i * b_i + (1 - h_i) * (1 - b_i)) for every b in the hypercube
+def _eq_table(values: list, p: int):
+
+    table = field_array([1], p)
+
+    for h in values:
+        table = np.concatenate((table * ((1 - h) % p) % p, table * h % p))
+
+    return table
+
+
+# answers every operator by folding tables of the values f_v takes on the boolean hypercube,
+# where f_n = P_phi and f_{v - 1} is the sum (exists) or the product (forall) of the two halves
+# of f_v, this replaces the symbolic operator chain of HonestProver by O(2^n) field operations
+class SumcheckProver(Prover):
+
+    def __init__(self, /, qbf: QBF):
+        super().__init__(qbf, 0)
+
+        self.schedule = ProofSchedule(qbf)
+
+        n = qbf.get_variable_count()
+
+        # products of universal quantifiers can grow arbitrarily, existential sums can not
+        exact_dtype = np.int64 if n < 62 and all(
+            qbf.get_quantification(v) == QBF.Q_EXISTS for v in range(1, n + 1)
+        ) else object
+
+        # P_phi is 0 or 1 on the hypercube, so the modulus used to evaluate it does not matter
+        f = qbf.evaluate_matrix(
+            {v: _cube_bits(n, v - 1) for v in range(1, n + 1)},
+            qbf.get_lower_bound_for_protocol_prime()
+        ) * np.ones(1 << n, dtype=np.int64)
+
+        tables = [np.array(f, dtype=exact_dtype)]
+
+        for v in range(n, 0, -1):
+
+            half = len(tables[-1]) // 2
+            low, high = tables[-1][:half], tables[-1][half:]
+
+            tables.append(low * high if qbf.get_quantification(v) == QBF.Q_FORALL else low + high)
+
+        tables.reverse()
+
+        self.p = qbf.get_lower_bound_for_protocol_prime()
+
+        self.entire_polynomial_value = int(tables[0][0])
+
+        if self.entire_polynomial_value != 0:
+            # qbf sentence is true
+            while self.entire_polynomial_value % self.p == 0:
+                self.p = next_prime(self.p)
+
+            self.entire_polynomial_value %= self.p
+
+        # self._tables[v] holds the values of f_v modulo p
+        self._tables = [field_array(table % self.p, self.p) for table in tables]
+
+        logger.info("Computed the hypercube tables of %d variables", n)
+
+        # the last tables folded in their lowest variables, consecutive rounds
+        # fix more and more of these variables, so the folds are reused
+        self._folded = (None, (), [])
+
+        self._eq = ((), field_array([1], self.p))
+
+    def get_value_of_entire_polynomial(self) -> int:
+        return self.entire_polynomial_value
+
+    def _fold_low_variables(self, key: tuple, tables: list, values: list) -> list:
+
+        values = tuple(a % self.p for a in values)
+
+        cached_key, cached_values, cached_tables = self._folded
+
+        if cached_key == key and values[:len(cached_values)] == cached_values:
+            tables = cached_tables
+            fixed = len(cached_values)
+        else:
+            fixed = 0
+
+        for a in values[fixed:]:
+            tables = [_fold_lowest(table, a, self.p) for table in tables]
+
+        self._folded = (key, values, tables)
+
+        return tables
+
+    # values of sum_b eq(high, b) * prod_table table(low, x, b) at the given points x,
+    # where the tables are over the variables 1, ..., k and b ranges over the variables
+    # following the primary one
+    def _sum_of_products(self, key: tuple, tables: list, low: list, high: list, xs) -> list:
+
+        tables = self._fold_low_variables(key, tables, low)
+
+        eq = _eq_table(high, self.p)
+
+        evaluations = []
+
+        for x in xs:
+
+            product = eq
+
+            for table in tables:
+                product = product * _fold_lowest(table, x, self.p) % self.p
+
+            evaluations.append(int(np.sum(product) % self.p))
+
+        return evaluations
+
+    # values of sum_b eq(high, b) * P_phi(low, x, b) at the given points x
+    def _sum_of_matrix(self, low: list, high: list, xs) -> list:
+
+        k = len(high)
+        primary = len(low) + 1
+
+        values = {v: a % self.p for v, a in enumerate(low, start=1)}
+        values.update({primary + 1 + i: field_array(_cube_bits(k, i), self.p) for i in range(k)})
+
+        eq = _eq_table(high, self.p)
+
+        return [
+            int(np.sum(eq * self.qbf.evaluate_matrix({**values, primary: x}, self.p) % self.p) % self.p)
+            for x in xs
+        ]
+
+    def _get_operator_evaluations(self, operator: ProofOperator, random_choices: dict, degree: int) -> list:
+
+        v = operator.v
+        xs = range(degree + 1)
+
+        if not operator.is_linearity_operator():
+            # s is f_v's multilinear extension with all but the last variable fixed
+            return self._sum_of_products(
+                (v, 0), [self._tables[v]], [random_choices[i] for i in range(1, v)], [], xs
+            )
+
+        lv = operator.lv
+
+        low = [random_choices[i] for i in range(1, lv)]
+        high = [random_choices[i] for i in range(lv + 1, v + 1)]
+
+        # the operator is applied to L_{lv + 1} ... L_v applied to the result of the next quantifier,
+        # linearizing the variables after lv is the same as summing over them weighted by eq
+        if v == self.qbf.get_variable_count():
+            return self._sum_of_matrix(low, high, xs)
+
+        if self.qbf.get_quantification(v + 1) == QBF.Q_FORALL:
+            half = len(self._tables[v + 1]) // 2
+            tables = [self._tables[v + 1][:half], self._tables[v + 1][half:]]
+        else:
+            # the result of an existential quantifier on a multilinear polynomial is multilinear
+            tables = [self._tables[v]]
+
+        return self._sum_of_products((v, 1), tables, low, high, xs)
+
+    def _get_operator_polynomial(self, operator: ProofOperator, random_choices: dict):
+
+        # with tiny primes, s is only determined as a function on F_p
+        degree = evaluation_point_count(self.schedule.get_degree_bound(operator), self.p) - 1
+
+        return EvaluationForm(
+            self._get_operator_evaluations(operator, random_choices, degree), self.p
+        ).to_poly(self.qbf.get_symbol(operator.get_primary_variable()))
+
+    def _get_eq_table(self, point: list):
+
+        point = tuple(a % self.p for a in point)
+
+        if self._eq[0] != point:
+            self._eq = (point, _eq_table(list(point), self.p))
+
+        return self._eq[1]
+
+    def get_extension_evaluations(self, v: int, point: list, degree: int) -> list:
+        return self._sum_of_products((v, 0), [self._tables[v]], point, [], range(degree + 1))
+
+    def get_product_sum_evaluations(self, v: int, point: list, fixed: list, degree: int) -> list:
+
+        half = len(self._tables[v]) // 2
+
+        # eq(point, b) is folded together with both halves of f_v
+        return self._sum_of_products(
+            (v, 2, tuple(point)),
+            [self._get_eq_table(point), self._tables[v][:half], self._tables[v][half:]],
+            fixed, [], range(degree + 1)
+        )
+
+    def get_matrix_sum_evaluations(self, point: list, fixed: list, degree: int) -> list:
+
+        j = len(fixed)
+
+        # eq(point, (fixed, x, b)) splits into the factors of the fixed variables,
+        # the factor of x and eq over the remaining variables
+        scale = 1
+
+        for r, a in zip(point, fixed):
+            scale = scale * (r * a + (1 - r) * (1 - a)) % self.p
+
+        sums = self._sum_of_matrix(fixed, point[j + 1:], range(degree + 1))
+
+        return [
+            scale * (point[j] * x + (1 - point[j]) * (1 - x)) % self.p * value % self.p
+            for x, value in enumerate(sums)
+        ]
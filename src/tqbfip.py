@@ -5,6 +5,8 @@ from pathlib import Path
 from formulas import *
 from prover import HonestProver
 from verifier import run_verifier, VERIFIER_DEFAULT_SEED
+from preprocessing import preprocess_qbf
+from reorder import reorder_qbf
 
 
 def _resolve_root():
@@ -27,19 +29,45 @@ def _configure_loggers():
         logger.addHandler(fh)
 
 
-def tqbfip(qbf: QBF, /, *, seed: int):
+def tqbfip(qbf: QBF, /, *, seed: int, evaluation_form: bool = False, preprocess: bool = False,
+           adaptive: bool = False, reorder: bool = False, modular: bool = False, processes: int = 1):
 
     _configure_loggers()
 
     logger = logging.getLogger("protocol")
 
-    prover = HonestProver(qbf)
+    if preprocess:
+        # the preprocessing is deterministic and cheap, so the verifier
+        # can repeat it and agree with the prover on the reduced formula
+        preprocessed = preprocess_qbf(qbf)
+
+        if preprocessed.is_decided():
+            logger.info("[V]: Preprocessing has decided the formula, it is %s.",
+                        "true" if preprocessed.value else "false")
+            return
+
+        qbf = preprocessed.qbf
+
+        for v in range(1, qbf.get_variable_count() + 1):
+            logger.info("Variable %d of the preprocessed formula is variable %d (%s) of the original one",
+                        v, preprocessed.get_original_variable(v), preprocessed.get_original_name(v))
+
+    if reorder:
+        # like preprocessing, the reordering is deterministic, so the verifier can repeat it
+        original = qbf
+        qbf, variable_map = reorder_qbf(qbf)
+
+        for v in range(1, qbf.get_variable_count() + 1):
+            logger.info("Variable %d of the reordered formula is variable %d (%s) of the formula before reordering",
+                        v, variable_map[v], original.get_name(variable_map[v]))
+
+    prover = HonestProver(qbf, adaptive=adaptive, modular=modular, processes=processes)
 
     logger.info("Working modulo prime p = %d", prover.p)
 
     prover.log_operator_polynomials()
 
-    accepted = run_verifier(qbf, prover, prover.p, seed=seed)
+    accepted = run_verifier(qbf, prover, prover.p, seed=seed, evaluation_form=evaluation_form, adaptive=adaptive)
 
     logger.info("-" * 30)
     logger.info("[V]: Proof %s.", "accepted" if accepted else "rejected")
@@ -1,7 +1,9 @@
 from random import Random
 import logging
 from qbf import QBF
-from prover import Prover, ProofOperator
+from prover import Prover, ProofOperator, ProofSchedule
+from interpolation import EvaluationForm, evaluation_point_count
+from checkpoint import VerifierCheckpoint, write_verifier_checkpoint, read_verifier_checkpoint
 
 
 VERIFIER_DEFAULT_SEED = 0xcafe + 0xbeef
@@ -51,6 +53,22 @@ class DummyObserver(ProtocolObserver):
         pass
 
 
+class ChallengeSource:
+
+    # draw the verifier's random choice after the prover has sent s for the given operator
+    def draw(self, operator: ProofOperator, s, p: int) -> int:
+        raise NotImplementedError()
+
+
+class RandomChallenges(ChallengeSource):
+
+    def __init__(self, seed: int = None):
+        self.rng = Random(seed)
+
+    def draw(self, operator: ProofOperator, s, p: int) -> int:
+        return self.rng.randrange(p)
+
+
 def _log_random_choices(qbf: QBF, random_choices):
     log_str = ", ".join(("%s := %d" % (qbf.get_name(var), val) for var, val in random_choices.items()))
     logger.info("[V]: Random choices: %s", log_str if log_str else "none")
@@ -62,159 +80,199 @@ def _poly_to_str(poly) -> str:
 
 # evaluate univariate polynomial s at point x
 def evaluate_s(s, x: int, p: int) -> int:
+
+    if isinstance(s, EvaluationForm):
+        return s.evaluate(x)
+
     assert s.is_univariate or s.is_ground
     return int(s.eval(x).as_poly(s.gens).LC()) % p
 
 
+# check the shape of the prover's message before doing any work with it,
+# so that the cost of a round does not depend on what the prover sends
+def _is_within_degree_bound(s, degree_bound: int) -> bool:
+
+    if s.is_ground:
+        return True
+
+    return s.is_univariate and s.degree() <= degree_bound
+
+
+# evaluation_form = True means that the prover sends every s polynomial
+# as its values at 0, 1, ..., d instead of its coefficients
+# the random choices are drawn from Random(seed), unless a challenge source is given
+# adaptive = True skips the linearity operators that would not change the polynomial
+# with a checkpoint path, the state of the verifier is written to that file at the beginning of
+# every round, resume_from continues the session saved in such a file instead of starting a new one
 def run_verifier(qbf: QBF, /, prover: Prover, p: int, *,
-                 seed: int = None, observer: ProtocolObserver = DummyObserver()):
+                 seed: int = None, observer: ProtocolObserver = DummyObserver(),
+                 evaluation_form: bool = False, challenges: ChallengeSource = None,
+                 adaptive: bool = False, checkpoint: str = None, resume_from: str = None):
 
     observer.p = p
 
-    logger.info("[V]: Asking prover to send value of the entire polynomial")
+    schedule = ProofSchedule(qbf, adaptive)
 
-    # first we ask the prover what he considers to be the value of the entire polynomial
-    c = prover.get_value_of_entire_polynomial()
+    if resume_from is not None:
 
-    logger.info("[P]: Value = %d =: c" % c)
+        saved = read_verifier_checkpoint(resume_from)
 
-    observer.on_handshake(p, c)
+        if not saved.matches(qbf, p, adaptive, evaluation_form):
+            raise ValueError("The checkpoint %s belongs to a different protocol session" % resume_from)
 
-    if c == 0:
-        # this is absurd, the prover has directly confessed that he
-        # would like to prove that the QBF sentence is false
-        observer.on_terminated(False)
-        return False
+        rc, c, challenges = saved.rc, saved.c, saved.challenges
+        first_round = saved.round_number
+
+        logger.info("[V]: Resuming the protocol at round %d, c = %d", first_round, c)
 
-    rng = Random(seed)
+        observer.on_handshake(p, c)
 
-    rc = {}
+    else:
 
-    for v in range(1, qbf.get_variable_count() + 1):
+        logger.info("[V]: Asking prover to send value of the entire polynomial")
 
-        current_operator = ProofOperator(v)
+        # first we ask the prover what he considers to be the value of the entire polynomial
+        c = prover.get_value_of_entire_polynomial()
+
+        logger.info("[P]: Value = %d =: c" % c)
+
+        observer.on_handshake(p, c)
+
+        if c == 0:
+            # this is absurd, the prover has directly confessed that he
+            # would like to prove that the QBF sentence is false
+            observer.on_terminated(False)
+            return False
+
+        if challenges is None:
+            challenges = RandomChallenges(seed)
+
+        rc = {}
+        first_round = 1
+
+    for current_operator in schedule.get_operators()[first_round - 1:]:
+
+        if checkpoint is not None:
+            write_verifier_checkpoint(checkpoint, VerifierCheckpoint(
+                qbf.to_dict(), p, adaptive, evaluation_form,
+                schedule.get_round_number(current_operator), rc, c, challenges
+            ))
+
+        variable = current_operator.get_primary_variable()
 
         logger.info("-" * 30)
         logger.info(
             "Starting round %d. Current operator: %s",
-            current_operator.get_round_number(),
+            schedule.get_round_number(current_operator),
             current_operator.to_string(qbf)
         )
-        _log_random_choices(qbf, rc)
 
-        # noinspection DuplicatedCode
-        logger.info("[V]: Asking prover to send s(%s) = h(%s)", qbf.get_name(v), qbf.get_name(v))
+        if not current_operator.is_linearity_operator():
+            _log_random_choices(qbf, rc)
 
-        s = prover.get_operator_polynomial(current_operator, rc)
+        logger.info("[V]: Asking prover to send s(%s) = h(%s)", qbf.get_name(variable), qbf.get_name(variable))
 
-        logger.info("[P]: Sending s(%s) = %s", qbf.get_name(v), _poly_to_str(s))
-        logger.info("[P]: deg(s(%s)) = %s", qbf.get_name(v), s.degree())
+        degree_bound = schedule.get_degree_bound(current_operator)
 
-        quantification = qbf.get_quantification(v)
+        if evaluation_form:
+            point_count = evaluation_point_count(degree_bound, p)
 
-        if quantification == QBF.Q_FORALL:
-            # check that s(0) * s(1) = c
+            values = prover.get_operator_evaluations(current_operator, rc, point_count - 1)
 
-            check_product = evaluate_s(s, 0, p) * evaluate_s(s, 1, p)
-            check_product %= p
+            within_degree_bound = 1 <= len(values) <= point_count
+        else:
+            s = prover.get_operator_polynomial(current_operator, rc)
 
-            logger.info("[V]: s(0) * s(1) = %d, expecting to be equal to c = %d", check_product, c)
+            within_degree_bound = _is_within_degree_bound(s, degree_bound)
 
-            if check_product != c:
-                logger.info("[V]: The above check has failed, "
-                            "meaning that the prover has sent a malformed s polynomial.")
-                observer.on_terminated(False)
-                return False
+        if not within_degree_bound:
+            logger.info("[V]: The prover has sent a polynomial that is not univariate or exceeds "
+                        "the degree bound %d, rejecting without evaluating it.", degree_bound)
+            observer.on_terminated(False)
+            return False
 
-        elif quantification == QBF.Q_EXISTS:
+        if evaluation_form:
+            s = EvaluationForm(values, p)
 
-            # check that s(0) + s(1) = c
-            check_sum = evaluate_s(s, 0, p) + evaluate_s(s, 1, p)
-            check_sum %= p
+            logger.info("[P]: Sending s(%s) at 0, ..., %d: %s", qbf.get_name(variable), s.degree(), s)
+        else:
+            logger.info("[P]: Sending s(%s) = %s", qbf.get_name(variable), _poly_to_str(s))
+            logger.info("[P]: deg(s(%s)) = %s", qbf.get_name(variable), s.degree())
 
-            logger.info("[V]: s(0) + s(1) = %d, expecting to be equal to c = %d", check_sum, c)
+        s_0 = evaluate_s(s, 0, p)
+        s_1 = evaluate_s(s, 1, p)
 
-            if check_sum != c:
-                logger.info("[V]: The above check has failed, "
-                            "meaning that the prover has sent a malformed s polynomial.")
-                observer.on_terminated(False)
-                return False
-        else:
-            assert False
+        if current_operator.is_linearity_operator():
 
-        # choose a from F_p
-        a = rng.randrange(p)
-        rc[v] = a
+            lin_var_val = rc[variable]
 
-        logger.info("[V]: Chose a = %d for variable %s", a, qbf.get_name(v))
-        _log_random_choices(qbf, rc)
+            check_sum = (lin_var_val * s_1 + (1 - lin_var_val) * s_0) % p
 
-        _prev_c = c
+            logger.info("[V]: a_1 * s_1 + (1 - a_1) * s_0 = %d, expecting to be equal to c = %d", check_sum, c)
 
-        # calculate c = s(a)
-        c = evaluate_s(s, a, p)
+            check_passed = check_sum == c
 
-        logger.info("[V]: s(a) = %d =: c", c)
+        elif qbf.get_quantification(variable) == QBF.Q_FORALL:
+            lin_var_val = None
 
-        observer.on_new_round(current_operator, s, _prev_c, rc, c)
+            # check that s(0) * s(1) = c
+            check_product = (s_0 * s_1) % p
 
-        for lin_var in range(1, v + 1):
+            logger.info("[V]: s(0) * s(1) = %d, expecting to be equal to c = %d", check_product, c)
 
-            current_operator = ProofOperator(v, lin_var)
+            check_passed = check_product == c
 
-            logger.info("-" * 30)
-            logger.info(
-                "Starting round %d. Current operator: %s",
-                current_operator.get_round_number(),
-                current_operator.to_string(qbf)
-            )
+        elif qbf.get_quantification(variable) == QBF.Q_EXISTS:
+            lin_var_val = None
 
-            # noinspection DuplicatedCode
-            logger.info(
-                "[V]: Asking prover to send s(%s) = h(%s)",
-                qbf.get_name(lin_var),
-                qbf.get_name(lin_var)
-            )
+            # check that s(0) + s(1) = c
+            check_sum = (s_0 + s_1) % p
 
-            s = prover.get_operator_polynomial(current_operator, rc)
+            logger.info("[V]: s(0) + s(1) = %d, expecting to be equal to c = %d", check_sum, c)
 
-            logger.info("[P]: Sending s(%s) = %s", qbf.get_name(lin_var), _poly_to_str(s))
-            logger.info("[P]: deg(s(%s)) = %s", qbf.get_name(lin_var), s.degree())
+            check_passed = check_sum == c
 
-            s_0 = evaluate_s(s, 0, p)
-            s_1 = evaluate_s(s, 1, p)
+        else:
+            assert False
 
-            lin_var_val = rc[lin_var]
+        if not check_passed:
+            logger.info("[V]: The above check has failed, "
+                        "meaning that the prover has sent a malformed s polynomial.")
+            observer.on_terminated(False)
+            return False
 
-            check_sum = (lin_var_val * s_1 + (1 - lin_var_val) * s_0) % p
+        # choose a from F_p
+        a = challenges.draw(current_operator, s, p)
+        rc[variable] = a
 
-            logger.info("[V]: a_1 * s_1 + (1 - a_1) * s_0 = %d, expecting to be equal to c = %d", check_sum, c)
+        if current_operator.is_linearity_operator():
+            logger.info("[V]: Re-chose a = %d for variable %s (while linearizing it)", a, qbf.get_name(variable))
+        else:
+            logger.info("[V]: Chose a = %d for variable %s", a, qbf.get_name(variable))
 
-            if check_sum != c:
-                logger.info("[V]: The above check has failed, "
-                            "meaning that the prover has sent a malformed s polynomial.")
-                observer.on_terminated(False)
-                return False
-
-            # choose a from F_p
-            a = rng.randrange(p)
-            rc[lin_var] = a
-
-            logger.info(
-                "[V]: Re-chose a = %d for variable %s (while linearizing it)",
-                a,
-                qbf.get_name(lin_var)
-            )
-            _log_random_choices(qbf, rc)
+        _log_random_choices(qbf, rc)
+
+        _prev_c = c
+
+        # calculate c = s(a)
+        c = evaluate_s(s, a, p)
 
-            _prev_c = c
+        logger.info("[V]: s(a) = %d =: c", c)
+
+        observer.on_new_round(current_operator, s, _prev_c, rc, c, lin_var_val)
 
-            # calculate c = s(a)
-            c = evaluate_s(s, a, p)
+    # all operators have been stripped away, the last claim is about P_phi itself,
+    # which the verifier can evaluate on its own
+    matrix_value = qbf.evaluate_matrix(rc, p)
 
-            logger.info("[V]: s(a) = %d =: c" % c)
+    logger.info("-" * 30)
+    logger.info("[V]: P_phi at the random choices = %d, expecting to be equal to c = %d", matrix_value, c)
 
-            observer.on_new_round(current_operator, s, _prev_c, rc, c, lin_var_val)
+    if matrix_value != c:
+        logger.info("[V]: The above check has failed, "
+                    "meaning that the prover has lied about the arithmetization of the matrix.")
+        observer.on_terminated(False)
+        return False
 
     observer.on_terminated(True)
     return True